@@ -0,0 +1,180 @@
+from collections import OrderedDict
+from os import environ
+from threading import Lock
+from typing import List, Optional
+from uuid import uuid4
+
+from fastapi import HTTPException
+from nicegui import app
+from pydantic import BaseModel, Field
+
+from configuration import DEFAULT_TRANSLATION, ContextBoundary, Difficulty, SearchCategory
+from daily import DAILY_CONTEXT_COUNT, daily_puzzle, today
+from distance import verse_id
+from game import score_guesses
+from lookups import context_window, use_translation, verse_by_id
+from prefetch import answers
+from references import parse_reference
+from search import search
+from state import guess_done
+from translations import translations
+
+# games are held in memory by the process that started them, oldest dropped first
+MAX_GAMES = int(environ.get("SWORDDRILL_API_GAMES", 10000))
+
+_games: "OrderedDict[str, dict]" = OrderedDict()
+_lock = Lock()
+
+
+class NewGame(BaseModel):
+    categories: List[int] = [category.value for category in SearchCategory]
+    context_count: int = Field(1, ge=0, le=10)
+    context_boundary: int = ContextBoundary.Bible.value
+    total_guesses: int = Field(7, ge=1)
+    difficulty: int = Difficulty.Any.value
+    # today's verse, the same for everyone, instead of a random one
+    daily: bool = False
+    translation: str = DEFAULT_TRANSLATION
+
+
+class NewGuess(BaseModel):
+    book: Optional[str] = None
+    chapter: Optional[int] = None
+    verse: Optional[int] = None
+    # or the whole reference as typed, "jn 3 16"
+    reference: Optional[str] = None
+
+
+def get_game(game_id: str) -> dict:
+    with _lock:
+        game = _games.get(game_id)
+        if game is None:
+            raise HTTPException(status_code=404, detail="unknown game")
+        _games.move_to_end(game_id)
+        return game
+
+
+def game_status(game: dict, guesses: list) -> str:
+    if guesses and guess_done(guesses[-1]):
+        return "won"
+    if len(guesses) >= game["total_guesses"]:
+        return "lost"
+    return "playing"
+
+
+def game_view(game_id: str, game: dict) -> dict:
+    translation = game["translation"]
+    answer = verse_by_id(game["answer_id"], translation)
+    if game["daily"] is not None:
+        _, pre_context, post_context = daily_puzzle(game["daily"], translation)
+    else:
+        pre_context, post_context = context_window(
+            game["answer_id"], game["context_count"], game["context_boundary"], translation
+        )
+    guesses = score_guesses(game["answer_id"], game["guesses"], translation)
+    status = game_status(game, guesses)
+
+    return {
+        "game_id": game_id,
+        "translation": translation,
+        "status": status,
+        "text": answer["text"],
+        "pre_context": [verse["text"] for verse in pre_context],
+        "post_context": [verse["text"] for verse in post_context],
+        "guesses": guesses,
+        "guesses_remaining": game["total_guesses"] - len(guesses),
+        "answer": answer_reference(game, status, answer),
+    }
+
+
+def answer_reference(game: dict, status: str, answer: dict) -> Optional[dict]:
+    # the reference is only given away once the game is over, and today's verse only to someone who tried it
+    if status == "playing" or (game["daily"] is not None and not game["guesses"]):
+        return None
+    return {key: answer[key] for key in ("book", "chapter", "verse")}
+
+
+@app.post("/api/games")
+async def start_game(options: Optional[NewGame] = None):
+    options = options or NewGame()
+    if not options.categories:
+        raise HTTPException(status_code=400, detail="at least one category is required")
+    unknown = sorted(set(options.categories) - {category.value for category in SearchCategory})
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"unknown categories {unknown}")
+    if options.context_boundary not in {boundary.value for boundary in ContextBoundary}:
+        raise HTTPException(status_code=400, detail="unknown context_boundary")
+    if options.difficulty not in {difficulty.value for difficulty in Difficulty}:
+        raise HTTPException(status_code=400, detail="unknown difficulty")
+    if options.translation not in translations():
+        raise HTTPException(status_code=400, detail="unknown translation")
+
+    loaded = await use_translation(options.translation)
+    if not any(category in loaded.catalog.category_ranges for category in options.categories):
+        raise HTTPException(status_code=400, detail="no verses in the chosen categories")
+
+    day = today() if options.daily else None
+    if day is not None:
+        answer, _, _ = daily_puzzle(day, options.translation)
+    else:
+        answer = await answers.take(options.categories, options.difficulty, options.translation)
+
+    game = {
+        "answer_id": verse_id(answer, options.translation),
+        "translation": options.translation,
+        "daily": day,
+        "context_count": DAILY_CONTEXT_COUNT if day is not None else options.context_count,
+        "context_boundary": options.context_boundary,
+        "total_guesses": options.total_guesses,
+        "guesses": [],
+    }
+    game_id = uuid4().hex
+
+    with _lock:
+        _games[game_id] = game
+        while len(_games) > MAX_GAMES:
+            _games.popitem(last=False)
+
+    return game_view(game_id, game)
+
+
+@app.get("/api/games/{game_id}")
+def game_state(game_id: str):
+    return game_view(game_id, get_game(game_id))
+
+
+@app.post("/api/games/{game_id}/guesses")
+def submit_guess(game_id: str, guess: NewGuess):
+    game = get_game(game_id)
+
+    try:
+        translation = game["translation"]
+        guess_id = verse_id(
+            parse_reference(guess.reference, translation) if guess.reference else guess.model_dump(), translation
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except (KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="unknown verse")
+
+    with _lock:
+        guesses = score_guesses(game["answer_id"], game["guesses"], game["translation"])
+        if game_status(game, guesses) != "playing":
+            raise HTTPException(status_code=409, detail="game is over")
+        game["guesses"].append(guess_id)
+
+    view = game_view(game_id, game)
+    view["guess"] = view["guesses"][-1]
+    return view
+
+
+@app.get("/api/search")
+def search_verses(q: str, limit: int = 20, translation: str = DEFAULT_TRANSLATION):
+    if translation not in translations():
+        raise HTTPException(status_code=400, detail="unknown translation")
+    return [match._asdict() for match in search(q, min(limit, 100), translation)]
+
+
+@app.get("/api/translations")
+def translation_list():
+    return translations()
@@ -0,0 +1,125 @@
+"""Time the hot lookup and scoring paths against a synthetic bible.db.
+
+    python benchmark.py            compare with benchmark_baseline.json, exit 1 on a regression
+    python benchmark.py --update   record the current timings as the new baseline
+
+The database is generated with synthetic.py on first use, so runs are reproducible
+without the real bible.db.
+"""
+import json
+from argparse import ArgumentParser
+from os import environ, path
+from random import Random
+from sys import exit
+from time import perf_counter
+from typing import Callable, Dict, List
+
+BASELINE = path.join(path.dirname(path.abspath(__file__)), "benchmark_baseline.json")
+
+
+def measure(fn: Callable, iterations: int) -> float:
+    """Best of five runs, in microseconds per call."""
+    best = float("inf")
+    for _ in range(5):
+        start = perf_counter()
+        for i in range(iterations):
+            fn(i)
+        best = min(best, perf_counter() - start)
+    return best / iterations * 10**6
+
+
+def run(iterations: int) -> Dict[str, float]:
+    # imported here so BIBLE_DB / BIBLE_CORPUS are set before the modules read them
+    from catalog import catalog
+    from distance import (
+        percent_between,
+        row_ids,
+        distance_between_books,
+        distance_between_chapters,
+        distance_between_verses,
+        verse_index,
+    )
+    from game import score_guess
+    from lookups import context_window, random_verse_from_category, verse_by_id
+
+    catalog()
+    verse_index()
+
+    random = Random(0)
+    ids = list(catalog().verse_ids)
+    pairs = [(random.choice(ids), random.choice(ids)) for _ in range(iterations)]
+    verses = [(verse_by_id(a), verse_by_id(g)) for a, g in pairs]
+    categories = [1, 2, 3, 4, 5, 6, 7, 8, 9]
+
+    def answer_of(i):
+        return verses[i][0]
+
+    benchmarks: Dict[str, Callable] = {
+        "row_ids": lambda i: row_ids(*verses[i]),
+        "percent_between": lambda i: percent_between(*pairs[i]),
+        "distance_between_books": lambda i: distance_between_books(*pairs[i]),
+        "distance_between_chapters": lambda i: distance_between_chapters(*pairs[i], answer_of(i)["book"]),
+        "distance_between_verses": lambda i: distance_between_verses(
+            *pairs[i], answer_of(i)["book"], answer_of(i)["chapter"]
+        ),
+        "random_verse_from_category": lambda i: random_verse_from_category(categories),
+        "context_window": lambda i: context_window(pairs[i][0], 10),
+        "score_guess": lambda i: score_guess(*verses[i]),
+    }
+
+    return {name: measure(fn, iterations) for name, fn in benchmarks.items()}
+
+
+def compare(results: Dict[str, float], baseline: Dict[str, float], tolerance: float) -> List[str]:
+    regressions = []
+    for name, value in results.items():
+        expected = baseline.get(name)
+        if expected is not None and value > expected * tolerance:
+            regressions.append(f"{name}: {value:.2f}us vs baseline {expected:.2f}us")
+    return regressions
+
+
+def main() -> int:
+    parser = ArgumentParser(description="benchmark sworddrill lookups and scoring")
+    parser.add_argument("--database", default="synthetic.db")
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--iterations", type=int, default=2000)
+    # timings vary between machines, only flag calls that got several times slower
+    parser.add_argument("--tolerance", type=float, default=3.0)
+    parser.add_argument("--update", action="store_true")
+    args = parser.parse_args()
+
+    if not path.exists(args.database):
+        from synthetic import generate
+
+        generate(args.database, args.scale)
+
+    environ["BIBLE_DB"] = args.database
+    environ["BIBLE_CORPUS"] = args.database + ".corpus"
+    environ.setdefault("SWORDDRILL_METRICS", "0")
+
+    results = run(args.iterations)
+    for name, value in results.items():
+        print(f"{name:<28} {value:10.2f}us")
+
+    if args.update or not path.exists(BASELINE):
+        with open(BASELINE, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"baseline written to {BASELINE}")
+        return 0
+
+    with open(BASELINE) as f:
+        regressions = compare(results, json.load(f), args.tolerance)
+
+    if regressions:
+        print(f"REGRESSION (more than {args.tolerance}x the baseline):")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,188 @@
+from array import array
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Sequence, Tuple
+
+from configuration import DEFAULT_TRANSLATION
+from corpus import ChapterVerses, Corpus, References, VerseIds, open_corpus
+from database import get_connection
+from translations import MAX_LOADED, verse_table
+
+
+class Catalog(NamedTuple):
+    # title_short of every book, in book_info.order
+    books: List[str]
+    # book_info.order <-> title_short
+    book_orders: Dict[str, int]
+    book_titles: Dict[int, str]
+    # book_info.chapters per book
+    chapter_counts: Dict[str, int]
+    # chapter numbers per book and verse numbers per (book, chapter), ascending
+    chapters: Dict[str, List[int]]
+    verses: Mapping[Tuple[str, int], List[int]]
+    # (book, chapter, verse) -> id in the translation's table
+    ids: Mapping[Tuple[str, int, int], int]
+    # id -> (book, chapter, verse)
+    references: Mapping[int, Tuple[str, int, int]]
+    # position in id order -> id
+    verse_ids: Sequence[int]
+    # key_english.g -> [start, stop) position ranges of the verses in that category
+    category_ranges: Dict[int, List[Tuple[int, int]]]
+
+
+@lru_cache(maxsize=MAX_LOADED)
+def catalog(translation: str = DEFAULT_TRANSLATION) -> Catalog:
+    corpus = open_corpus(translation)
+    if corpus is not None and corpus.ordered:
+        return catalog_from_corpus(corpus)
+    if corpus is not None:
+        return build_catalog(
+            corpus.book_rows,
+            corpus.category_rows,
+            zip(corpus.ids, corpus.books, corpus.chapters, corpus.verses),
+        )
+
+    return catalog_from_database(translation)
+
+
+def catalog_from_database(translation: str = DEFAULT_TRANSLATION) -> Catalog:
+    conn = get_connection()
+    book_rows = conn.execute(
+        """
+        SELECT bi.`order`, bi.title_short, bi.chapters
+          FROM book_info AS bi
+         ORDER BY bi.`order` ASC;
+        """
+    ).fetchall()
+    category_rows = conn.execute(
+        """
+        SELECT ke.b, ke.g
+          FROM key_english AS ke;
+        """
+    ).fetchall()
+    verse_rows = conn.execute(
+        f"""
+        SELECT k.id, k.book, k.chapter, k.verse
+          FROM `{verse_table(translation)}` AS k
+         ORDER BY k.id ASC;
+        """
+    )
+
+    return build_catalog(book_rows, category_rows, verse_rows)
+
+
+def catalog_from_corpus(corpus: Corpus) -> Catalog:
+    """Serve the per-verse lookups from the mapped columns, only the books and chapters are built here."""
+    books, book_orders, book_titles, chapter_counts = book_tables(corpus.book_rows)
+    book_categories: Dict[int, int] = {b: g for b, g in corpus.category_rows}
+
+    chapters: Dict[str, List[int]] = {title: [] for title in books}
+    chapter_ranges: Dict[Tuple[str, int], Tuple[int, int]] = {}
+    category_ranges: Dict[int, List[Tuple[int, int]]] = {}
+
+    # one binary search per chapter over the chapter_ordinal column, which only grows
+    start = 0
+    while start < corpus.count:
+        stop = bisect_right(corpus.chapter_ordinal, corpus.chapter_ordinal[start], start)
+        order = corpus.books[start]
+
+        category = book_categories.get(order)
+        if category is not None:
+            ranges = category_ranges.setdefault(category, [])
+            if ranges and ranges[-1][1] == start:
+                ranges[-1] = (ranges[-1][0], stop)
+            else:
+                ranges.append((start, stop))
+
+        title = book_titles.get(order)
+        if title is not None:
+            chapters[title].append(corpus.chapters[start])
+            chapter_ranges[(title, corpus.chapters[start])] = (start, stop)
+        start = stop
+
+    return Catalog(
+        books,
+        book_orders,
+        book_titles,
+        chapter_counts,
+        chapters,
+        ChapterVerses(chapter_ranges, corpus.verses),
+        VerseIds(chapter_ranges, corpus.verses, corpus.ids),
+        References(corpus.positions, book_titles, corpus.books, corpus.chapters, corpus.verses),
+        corpus.ids,
+        category_ranges,
+    )
+
+
+def book_tables(
+    book_rows: Iterable[Sequence],
+) -> Tuple[List[str], Dict[str, int], Dict[int, str], Dict[str, int]]:
+    """Book titles in order, title -> order, order -> title and title -> chapters from (order, title_short, chapters)."""
+    books: List[str] = []
+    book_orders: Dict[str, int] = {}
+    book_titles: Dict[int, str] = {}
+    chapter_counts: Dict[str, int] = {}
+
+    for order, title, chapter_count in book_rows:
+        if title not in book_orders:
+            books.append(title)
+        book_orders[title] = order
+        book_titles[order] = title
+        chapter_counts[title] = chapter_count
+
+    return books, book_orders, book_titles, chapter_counts
+
+
+def build_catalog(
+    book_rows: Iterable[Sequence], category_rows: Iterable[Sequence], verse_rows: Iterable[Sequence]
+) -> Catalog:
+    """Build the catalog from (order, title_short, chapters), (b, g) and (id, book, chapter, verse) rows in id order."""
+    books, book_orders, book_titles, chapter_counts = book_tables(book_rows)
+    chapters: Dict[str, List[int]] = {title: [] for title in books}
+    verses: Dict[Tuple[str, int], List[int]] = {}
+    ids: Dict[Tuple[str, int, int], int] = {}
+    references: Dict[int, Tuple[str, int, int]] = {}
+    verse_ids = array("q")
+    category_ranges: Dict[int, List[Tuple[int, int]]] = {}
+
+    book_categories: Dict[int, int] = {b: g for b, g in category_rows}
+
+    for position, (id, order, chapter, verse) in enumerate(verse_rows):
+        verse_ids.append(id)
+
+        category = book_categories.get(order)
+        if category is not None:
+            ranges = category_ranges.setdefault(category, [])
+            if ranges and ranges[-1][1] == position:
+                ranges[-1] = (ranges[-1][0], position + 1)
+            else:
+                ranges.append((position, position + 1))
+
+        title = book_titles.get(order)
+        if title is None:
+            continue
+
+        if (title, chapter) not in verses:
+            chapters[title].append(chapter)
+            verses[(title, chapter)] = []
+        verses[(title, chapter)].append(verse)
+        ids[(title, chapter, verse)] = id
+        references[id] = (title, chapter, verse)
+
+    for chapter_list in chapters.values():
+        chapter_list.sort()
+    for verse_list in verses.values():
+        verse_list.sort()
+
+    return Catalog(
+        books,
+        book_orders,
+        book_titles,
+        chapter_counts,
+        chapters,
+        verses,
+        ids,
+        references,
+        verse_ids,
+        category_ranges,
+    )
@@ -16,3 +16,20 @@ class SearchCategory(Enum):
     Acts = 6
     Epistles = 7
     Apocalyptic = 8
+
+
+class ContextBoundary(Enum):
+    Bible = auto()
+    Book = auto()
+    Chapter = auto()
+
+
+class Difficulty(Enum):
+    Any = auto()
+    Easy = auto()
+    Medium = auto()
+    Hard = auto()
+
+
+# verse table used unless a game asks for another translation
+DEFAULT_TRANSLATION = "kjv"
@@ -0,0 +1,303 @@
+"""Compact, memory-mapped export of bible.db.
+
+The file holds a small JSON header describing the books, followed by fixed-width
+8 byte columns indexed by position in kjv.id order and a UTF-8 text blob:
+
+    ids, books, chapters, verses        N values each
+    cumulative_len                      N + 1 values
+    book_ordinal, chapter_ordinal       N values each
+    text_offsets                        N + 1 values
+    text                                text_offsets[N] bytes
+
+Each column is exposed as a zero-copy memoryview, so worker processes mapping the
+same file share its pages instead of building their own copies. When the rows are
+in (book, chapter, verse) order the catalog looks verses up in the columns as well,
+keeping only a range per chapter.
+
+    python corpus.py [output] [translation]
+
+Other translations than the default one go next to it, bible.<translation>.corpus.
+"""
+import json
+from array import array
+from bisect import bisect_left
+from functools import lru_cache
+from mmap import mmap, ACCESS_READ
+from os import environ, path
+from struct import Struct
+from sys import argv
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from configuration import DEFAULT_TRANSLATION
+from translations import MAX_LOADED
+
+CORPUS = environ.get("BIBLE_CORPUS", "bible.corpus")
+MAGIC = b"SWDC"
+VERSION = 1
+HEADER = Struct("<4sIIQ")
+COLUMNS = ["ids", "books", "chapters", "verses", "cumulative_len", "book_ordinal", "chapter_ordinal", "text_offsets"]
+# columns with one extra trailing value
+BOUNDED_COLUMNS = {"cumulative_len", "text_offsets"}
+
+
+def _padded(length: int) -> int:
+    return (length + 7) // 8 * 8
+
+
+class Positions:
+    """kjv.id -> position, answered by binary search over the ids column."""
+
+    def __init__(self, ids: memoryview):
+        self.ids = ids
+
+    def __getitem__(self, verse_id: int) -> int:
+        position = bisect_left(self.ids, verse_id)
+        if position == len(self.ids) or self.ids[position] != verse_id:
+            raise KeyError(verse_id)
+        return position
+
+    def __contains__(self, verse_id: int) -> bool:
+        try:
+            self[verse_id]
+        except KeyError:
+            return False
+        return True
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+class Texts:
+    """kjv.id -> text, decoded from the text blob on access."""
+
+    def __init__(self, positions: Positions, offsets: memoryview, text: memoryview):
+        self.positions = positions
+        self.offsets = offsets
+        self.text = text
+
+    def __getitem__(self, verse_id: int) -> str:
+        position = self.positions[verse_id]
+        return str(self.text[self.offsets[position] : self.offsets[position + 1]], "utf-8")
+
+
+class References:
+    """kjv.id -> (title_short, chapter, verse), read from the columns."""
+
+    def __init__(
+        self, positions: Positions, titles: Dict[int, str], books: memoryview, chapters: memoryview, verses: memoryview
+    ):
+        self.positions = positions
+        self.titles = titles
+        self.books = books
+        self.chapters = chapters
+        self.verses = verses
+
+    def __getitem__(self, verse_id: int) -> Tuple[str, int, int]:
+        position = self.positions[verse_id]
+        return self.titles[self.books[position]], self.chapters[position], self.verses[position]
+
+
+class ChapterVerses:
+    """(title_short, chapter) -> its verse numbers, sliced from the verses column."""
+
+    def __init__(self, chapter_ranges: Dict[Tuple[str, int], Tuple[int, int]], verses: memoryview):
+        # [start, stop) positions of each chapter's verses
+        self.chapter_ranges = chapter_ranges
+        self.verses = verses
+
+    def __getitem__(self, key: Tuple[str, int]) -> List[int]:
+        start, stop = self.chapter_ranges[key]
+        return self.verses[start:stop].tolist()
+
+    def get(self, key: Tuple[str, int], default=None):
+        return self[key] if key in self.chapter_ranges else default
+
+    def __contains__(self, key: Tuple[str, int]) -> bool:
+        return key in self.chapter_ranges
+
+    def __iter__(self) -> Iterator[Tuple[str, int]]:
+        return iter(self.chapter_ranges)
+
+    def __len__(self) -> int:
+        return len(self.chapter_ranges)
+
+
+class VerseIds:
+    """(title_short, chapter, verse) -> kjv.id, by binary search over the verses of the chapter."""
+
+    def __init__(self, chapter_ranges: Dict[Tuple[str, int], Tuple[int, int]], verses: memoryview, ids: memoryview):
+        self.chapter_ranges = chapter_ranges
+        self.verses = verses
+        self.ids = ids
+
+    def __getitem__(self, key: Tuple[str, int, int]) -> int:
+        title, chapter, verse = key
+        start, stop = self.chapter_ranges[(title, chapter)]
+        position = bisect_left(self.verses, verse, start, stop)
+        if position == stop or self.verses[position] != verse:
+            raise KeyError(key)
+        return self.ids[position]
+
+    def __contains__(self, key: Tuple[str, int, int]) -> bool:
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+
+class Corpus:
+    def __init__(self, filename: str):
+        with open(filename, "rb") as f:
+            self.buffer = mmap(f.fileno(), 0, access=ACCESS_READ)
+
+        magic, version, count, metadata_length = HEADER.unpack_from(self.buffer)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{filename} is not a version {VERSION} corpus file")
+
+        view = memoryview(self.buffer)
+        offset = HEADER.size
+        self.metadata = json.loads(bytes(view[offset : offset + metadata_length]))
+        offset += _padded(metadata_length)
+
+        self.count = count
+        columns: Dict[str, memoryview] = {}
+        for name in COLUMNS:
+            length = (count + 1 if name in BOUNDED_COLUMNS else count) * 8
+            columns[name] = view[offset : offset + length].cast("q")
+            offset += length
+
+        self.ids = columns["ids"]
+        self.books = columns["books"]
+        self.chapters = columns["chapters"]
+        self.verses = columns["verses"]
+        self.cumulative_len = columns["cumulative_len"]
+        self.book_ordinal = columns["book_ordinal"]
+        self.chapter_ordinal = columns["chapter_ordinal"]
+        self.text_offsets = columns["text_offsets"]
+
+        self.positions = Positions(self.ids)
+        self.texts = Texts(self.positions, self.text_offsets, view[offset : offset + self.text_offsets[count]])
+
+    @property
+    def book_rows(self) -> List[List]:
+        # [book_info.order, title_short, chapters]
+        return self.metadata["books"]
+
+    @property
+    def category_rows(self) -> List[List[int]]:
+        # [key_english.b, key_english.g]
+        return self.metadata["categories"]
+
+    @property
+    def ordered(self) -> bool:
+        # every row follows the one before it in (book, chapter, verse) order, so chapters are contiguous and sorted
+        return self.metadata.get("ordered", False)
+
+    @property
+    def database_version(self) -> int:
+        # PRAGMA user_version of the bible.db it was exported from, importer.py changes it
+        return self.metadata.get("database_version", 0)
+
+
+def corpus_path(translation: str = DEFAULT_TRANSLATION) -> str:
+    if translation == DEFAULT_TRANSLATION:
+        return CORPUS
+    stem, extension = path.splitext(CORPUS)
+    return f"{stem}.{translation}{extension}"
+
+
+@lru_cache(maxsize=MAX_LOADED)
+def open_corpus(translation: str = DEFAULT_TRANSLATION) -> Optional[Corpus]:
+    filename = corpus_path(translation)
+    if not path.exists(filename):
+        return None
+
+    from database import database_version
+
+    corpus = Corpus(filename)
+    if corpus.database_version != database_version():
+        # exported before bible.db was imported again, its text would be the old one
+        print(f"{filename} is out of date, export it again with `python corpus.py`")
+        return None
+    return corpus
+
+
+def export_corpus(filename: str, translation: str = DEFAULT_TRANSLATION):
+    # build from sqlite even if a corpus file is already present
+    from database import database_version, get_connection
+    from distance import verse_index_from_database
+    from translations import verse_table
+
+    index = verse_index_from_database(translation)
+    conn = get_connection()
+
+    ids: List[int] = []
+    books: List[int] = []
+    chapters: List[int] = []
+    verses: List[int] = []
+    text_offsets = [0]
+    text = bytearray()
+    ordered = True
+
+    resp = conn.execute(
+        f"""
+        SELECT k.id, k.book, k.chapter, k.verse, k.text
+          FROM `{verse_table(translation)}` AS k
+         ORDER BY k.id ASC;
+        """
+    )
+    for id, book, chapter, verse, verse_text in resp:
+        if ids and (book, chapter, verse) <= (books[-1], chapters[-1], verses[-1]):
+            ordered = False
+        ids.append(id)
+        books.append(book)
+        chapters.append(chapter)
+        verses.append(verse)
+        text += (verse_text or "").encode("utf-8")
+        text_offsets.append(len(text))
+
+    resp = conn.execute(
+        """
+        SELECT bi.`order`, bi.title_short, bi.chapters
+          FROM book_info AS bi
+         ORDER BY bi.`order` ASC;
+        """
+    )
+    book_rows = [list(r) for r in resp.fetchall()]
+    resp = conn.execute(
+        """
+        SELECT ke.b, ke.g
+          FROM key_english AS ke;
+        """
+    )
+    category_rows = [list(r) for r in resp.fetchall()]
+
+    described = {
+        "books": book_rows,
+        "categories": category_rows,
+        "ordered": ordered,
+        "database_version": database_version(),
+    }
+    metadata = json.dumps(described).encode("utf-8")
+    columns = {
+        "ids": ids,
+        "books": books,
+        "chapters": chapters,
+        "verses": verses,
+        "cumulative_len": index.cumulative_len,
+        "book_ordinal": index.book_ordinal,
+        "chapter_ordinal": index.chapter_ordinal,
+        "text_offsets": text_offsets,
+    }
+    with open(filename, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(ids), len(metadata)))
+        f.write(metadata.ljust(_padded(len(metadata)), b" "))
+        for name in COLUMNS:
+            f.write(array("q", columns[name]).tobytes())
+        f.write(text)
+
+
+if __name__ == "__main__":
+    translation = argv[2] if len(argv) > 2 else DEFAULT_TRANSLATION
+    export_corpus(argv[1] if len(argv) > 1 else corpus_path(translation), translation)
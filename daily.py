@@ -0,0 +1,28 @@
+from datetime import datetime, timezone
+from functools import lru_cache
+from random import Random
+from typing import List, Tuple
+
+from catalog import catalog
+from configuration import DEFAULT_TRANSLATION
+from lookups import context_window, verse_by_id
+from verse import VerseWithText
+
+# the same for every player, so the puzzle and its context only depend on the day
+DAILY_CONTEXT_COUNT = 1
+
+
+def today() -> str:
+    return datetime.now(timezone.utc).date().isoformat()
+
+
+@lru_cache(maxsize=8)
+def daily_puzzle(
+    day: str, translation: str = DEFAULT_TRANSLATION
+) -> Tuple[VerseWithText, List[VerseWithText], List[VerseWithText]]:
+    # a str seed is hashed the same way in every process, so all workers agree on the answer
+    verse_ids = catalog(translation).verse_ids
+    answer_id = verse_ids[Random(f"sworddrill-{day}").randrange(len(verse_ids))]
+    pre_context, post_context = context_window(answer_id, DAILY_CONTEXT_COUNT, translation=translation)
+
+    return verse_by_id(answer_id, translation), pre_context, post_context
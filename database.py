@@ -0,0 +1,73 @@
+from collections import namedtuple
+from functools import lru_cache
+from os import environ
+from sqlite3 import connect, Connection, Cursor
+from threading import Lock, get_ident
+from typing import Dict
+
+from metrics import connection_factory
+
+DATABASE = environ.get("BIBLE_DB", "bible.db")
+MMAP_SIZE = int(environ.get("BIBLE_DB_MMAP_SIZE", 256 * 1024 * 1024))
+CACHED_STATEMENTS = 64
+
+_lock = Lock()
+_connections: Dict[int, Connection] = {}
+_stats = {"opened": 0, "closed": 0, "checkouts": 0}
+
+
+@lru_cache(maxsize=None)
+def _row_class(fields):
+    return namedtuple("NamedRow", fields)
+
+
+def namedtuple_factory(cursor: Cursor, row):
+    fields = tuple(column[0] for column in cursor.description)
+    return _row_class(fields)._make(row)
+
+
+def open_connection() -> Connection:
+    # bible.db is never written at runtime, so sqlite can skip locking and change detection
+    conn = connect(
+        f"file:{DATABASE}?mode=ro&immutable=1",
+        uri=True,
+        cached_statements=CACHED_STATEMENTS,
+        # a thread id can be reused once its thread exits, the connection is never shared concurrently
+        check_same_thread=False,
+        factory=connection_factory,
+    )
+    conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE};")
+    conn.row_factory = namedtuple_factory
+    return conn
+
+
+def get_connection() -> Connection:
+    """Return the calling thread's pooled connection; callers must not close it."""
+    with _lock:
+        _stats["checkouts"] += 1
+
+        conn = _connections.get(get_ident())
+        if conn is None:
+            conn = open_connection()
+            _connections[get_ident()] = conn
+            _stats["opened"] += 1
+
+    return conn
+
+
+def database_version() -> int:
+    # importer.py sets a new one on every import
+    return get_connection().execute("PRAGMA user_version;").fetchone()[0]
+
+
+def close_connections():
+    with _lock:
+        for conn in _connections.values():
+            conn.close()
+            _stats["closed"] += 1
+        _connections.clear()
+
+
+def pool_stats() -> Dict[str, int]:
+    with _lock:
+        return {"size": len(_connections), **_stats}
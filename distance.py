@@ -1,235 +1,181 @@
+from array import array
 from functools import lru_cache
-from sqlite3 import connect, Connection
+from typing import Dict, Mapping, NamedTuple, Optional, Sequence
+from catalog import Catalog, catalog
+from configuration import DEFAULT_TRANSLATION
+from corpus import open_corpus
+from database import get_connection
+from translations import MAX_LOADED, len_column, verse_table
 from verse import Verse
 
 
-@lru_cache(maxsize=1)
-def max_distance_text() -> int:
-    conn = connect("bible.db")
-    resp = conn.execute(
-        """
-        SELECT sum(k.len)
-        FROM kjv AS k;
-        """
-    )
-    distance = resp.fetchone()[0]
-    conn.close()
-    return distance
+class VerseIndex(NamedTuple):
+    # id -> position of the row when ordered by id
+    positions: Mapping[int, int]
+    # cumulative_len[p] is the sum of len for every row before position p, which differs per translation
+    cumulative_len: Sequence[int]
+    # running count of distinct books / (book, chapter) pairs seen up to position p
+    book_ordinal: Sequence[int]
+    chapter_ordinal: Sequence[int]
 
 
-@lru_cache(maxsize=1)
-def max_distance_books() -> int:
-    conn = connect("bible.db")
-    resp = conn.execute(
-        """
-        SELECT count(*)
-        FROM book_info AS bi;
-        """
-    )
-    distance = resp.fetchone()[0]
-    conn.close()
-    return distance
+@lru_cache(maxsize=MAX_LOADED)
+def verse_index(translation: str = DEFAULT_TRANSLATION) -> VerseIndex:
+    corpus = open_corpus(translation)
+    if corpus is not None:
+        return VerseIndex(corpus.positions, corpus.cumulative_len, corpus.book_ordinal, corpus.chapter_ordinal)
+
+    return verse_index_from_database(translation)
 
 
-def max_distance_chapters(conn: Connection, book: str) -> int:
+def verse_index_from_database(translation: str = DEFAULT_TRANSLATION) -> VerseIndex:
+    conn = get_connection()
     resp = conn.execute(
+        f"""
+        SELECT k.id, {len_column(translation)} AS len, k.book, k.chapter
+          FROM `{verse_table(translation)}` AS k
+         ORDER BY k.id ASC;
         """
-        SELECT bi.chapters
-        FROM book_info AS bi
-        WHERE bi.title_short = ?;
-        """,
-        (book,),
     )
-    distance = resp.fetchone()[0]
-    return distance
 
+    positions: Dict[int, int] = {}
+    cumulative_len = array("q", [0])
+    book_ordinal = array("l")
+    chapter_ordinal = array("l")
+    total = 0
+    books = chapters = -1
+    previous_book = previous_chapter = None
+    for position, (id, length, book, chapter) in enumerate(resp):
+        positions[id] = position
+        total += length or 0
+        cumulative_len.append(total)
 
-def max_distance_verses(conn: Connection, book: str, chapter: int) -> int:
-    resp = conn.execute(
-        """
-        SELECT max(k.verse) AS max
-        FROM kjv AS k
-          LEFT JOIN book_info AS bi ON bi.`order` = k.book
-        WHERE bi.title_short = ?
-          AND k.chapter = ?;
-        """,
-        (
-            book,
-            chapter,
-        ),
-    )
-    distance = resp.fetchone().max
-    return distance
+        if book != previous_book:
+            books += 1
+            chapters += 1
+        elif chapter != previous_chapter:
+            chapters += 1
+        previous_book, previous_chapter = book, chapter
 
+        book_ordinal.append(books)
+        chapter_ordinal.append(chapters)
+
+    return VerseIndex(positions, cumulative_len, book_ordinal, chapter_ordinal)
+
+
+def max_distance_text(translation: str = DEFAULT_TRANSLATION, index: Optional[VerseIndex] = None) -> int:
+    return (index or verse_index(translation)).cumulative_len[-1]
+
+
+def max_distance_books(translation: str = DEFAULT_TRANSLATION, cat: Optional[Catalog] = None) -> int:
+    return len((cat or catalog(translation)).books)
+
+
+def max_distance_chapters(book: str, translation: str = DEFAULT_TRANSLATION, cat: Optional[Catalog] = None) -> int:
+    return (cat or catalog(translation)).chapter_counts[book]
 
-def row_ids(conn: Connection, answer: Verse, guess: Verse):
-    answer_resp = conn.execute(
-        """
-        /* answer */
-        SELECT k.id AS id
-          FROM kjv AS k
-            LEFT JOIN book_info AS bi ON bi.`order` = k.book
-         WHERE bi.title_short = ?
-           AND k.chapter = ?
-           AND k.verse = ?
-        """,
-        (
-            answer["book"],
-            answer["chapter"],
-            answer["verse"],
-        ),
-    )
-    guess_resp = conn.execute(
-        """
-        /* guess */
-        SELECT k.id AS id
-          FROM kjv AS k
-            LEFT JOIN book_info AS bi ON bi.`order` = k.book
-         WHERE bi.title_short = ?
-           AND k.chapter = ?
-           AND k.verse = ?;
-        """,
-        (
-            guess["book"],
-            guess["chapter"],
-            guess["verse"],
-        ),
-    )
 
-    answer_id = answer_resp.fetchone().id
-    guess_id = guess_resp.fetchone().id
+def max_distance_verses(
+    book: str, chapter: int, translation: str = DEFAULT_TRANSLATION, cat: Optional[Catalog] = None
+) -> int:
+    return max((cat or catalog(translation)).verses[(book, int(chapter))])
 
-    return answer_id, guess_id
 
+def verse_id(verse: Verse, translation: str = DEFAULT_TRANSLATION, cat: Optional[Catalog] = None) -> int:
+    return (cat or catalog(translation)).ids[(verse["book"], int(verse["chapter"]), int(verse["verse"]))]
 
-def len_between(conn: Connection, answer_id: int, guess_id: int) -> int:
+
+def row_ids(answer: Verse, guess: Verse, translation: str = DEFAULT_TRANSLATION, cat: Optional[Catalog] = None):
+    return verse_id(answer, translation, cat), verse_id(guess, translation, cat)
+
+
+def len_between(
+    answer_id: int, guess_id: int, translation: str = DEFAULT_TRANSLATION, index: Optional[VerseIndex] = None
+) -> int:
     if answer_id == guess_id:
         return 0
 
-    low_id = min(answer_id, guess_id)
-    high_id = max(answer_id, guess_id)
+    index = index or verse_index(translation)
+    low = index.positions[min(answer_id, guess_id)]
+    high = index.positions[max(answer_id, guess_id)]
 
-    resp = conn.execute(
-        """
-        SELECT sum(len) as delta
-          FROM kjv
-         WHERE id > ?
-           AND id < ?;
-        """,
-        (
-            low_id,
-            high_id,
-        ),
-    )
-    value = resp.fetchone().delta
-    return value if value else 0
+    # only the verses strictly between the answer and the guess count
+    return index.cumulative_len[high] - index.cumulative_len[low + 1]
 
 
-def percent_between(conn: Connection, answer_id: int, guess_id: int):
-    total = max_distance_text()
-    delta = len_between(conn, answer_id, guess_id)
+def percent_between(
+    answer_id: int, guess_id: int, translation: str = DEFAULT_TRANSLATION, index: Optional[VerseIndex] = None
+):
+    total = max_distance_text(translation, index)
+    delta = len_between(answer_id, guess_id, translation, index)
 
     return (delta / total) * 10**2, "lower" if guess_id <= answer_id else "higher"
 
 
-def distance_between_books(conn: Connection, answer_id: int, guess_id: int):
-    total_books = max_distance_books()
+def scoped_positions(answer_id: int, guess_id: int, index: VerseIndex):
+    return index.positions[min(answer_id, guess_id)], index.positions[max(answer_id, guess_id)]
 
-    if answer_id == guess_id:
-        return {"percent": 0.0, "count": 0, "unit": "books"}
 
-    low_id = min(answer_id, guess_id)
-    high_id = max(answer_id, guess_id)
+def distance_between_books(
+    answer_id: int,
+    guess_id: int,
+    translation: str = DEFAULT_TRANSLATION,
+    cat: Optional[Catalog] = None,
+    index: Optional[VerseIndex] = None,
+):
+    total_books = max_distance_books(translation, cat)
 
-    resp = conn.execute(
-        """
-        SELECT count(*) AS count
-          FROM (
-            SELECT DISTINCT k.book
-              FROM kjv AS k
-             WHERE id >= ?
-               AND id < ?
-          );
-        """,
-        (
-            low_id,
-            high_id,
-        ),
-    )
+    if answer_id == guess_id:
+        return {"percent": 0.0, "count": 0, "unit": "books"}
 
-    books = resp.fetchone().count
+    index = index or verse_index(translation)
+    low, high = scoped_positions(answer_id, guess_id, index)
 
-    if books <= 1:
-        # if the answer and guess are in the same book, then the distance is 0
-        books = 0
-    else:
-        # remove the answer book from the count
-        books -= 1
+    # books touched by the verses from low up to (not including) high, minus the first one
+    books = index.book_ordinal[high - 1] - index.book_ordinal[low]
 
     return {"percent": (books / total_books) * 10**2, "count": books, "unit": "books"}
 
 
-def distance_between_chapters(conn: Connection, answer_id: int, guess_id: int, book: str):
-    total_chapters = max_distance_chapters(conn, book)
+def distance_between_chapters(
+    answer_id: int,
+    guess_id: int,
+    book: str,
+    translation: str = DEFAULT_TRANSLATION,
+    cat: Optional[Catalog] = None,
+    index: Optional[VerseIndex] = None,
+):
+    total_chapters = max_distance_chapters(book, translation, cat)
 
     if answer_id == guess_id:
         return {"percent": 0.0, "count": 0, "unit": "chapters"}
 
-    low_id = min(answer_id, guess_id)
-    high_id = max(answer_id, guess_id)
-
-    resp = conn.execute(
-        """
-        SELECT count(*) AS count
-          FROM (
-            SELECT DISTINCT k.book, k.chapter
-              FROM kjv AS k
-             WHERE id >= ?
-               AND id < ?
-          );
-        """,
-        (
-            low_id,
-            high_id,
-        ),
-    )
+    index = index or verse_index(translation)
+    low, high = scoped_positions(answer_id, guess_id, index)
 
-    chapters = resp.fetchone().count
-
-    if chapters <= 1:
-        # if the answer and guess are in the same chapter, then the distance is 0
-        chapters = 0
-    else:
-        chapters -= 1
+    # chapters touched by the verses from low up to (not including) high, minus the first one
+    chapters = index.chapter_ordinal[high - 1] - index.chapter_ordinal[low]
 
     return {"percent": (chapters / total_chapters) * 10**2, "count": chapters, "unit": "chapters"}
 
 
-def distance_between_verses(conn: Connection, answer_id: int, guess_id: int, book: str, chapter: int):
-    total_verses = max_distance_verses(conn, book, chapter)
+def distance_between_verses(
+    answer_id: int,
+    guess_id: int,
+    book: str,
+    chapter: int,
+    translation: str = DEFAULT_TRANSLATION,
+    cat: Optional[Catalog] = None,
+    index: Optional[VerseIndex] = None,
+):
+    total_verses = max_distance_verses(book, chapter, translation, cat)
 
     if answer_id == guess_id:
         return {"percent": 0.0, "count": 0, "unit": "verses"}
 
-    low_id = min(answer_id, guess_id)
-    high_id = max(answer_id, guess_id)
-
-    resp = conn.execute(
-        """
-        SELECT count(*) AS count
-          FROM (
-            SELECT DISTINCT k.book, k.chapter, k.verse
-              FROM kjv AS k
-             WHERE id >= ?
-               AND id < ?
-          );
-        """,
-        (
-            low_id,
-            high_id,
-        ),
-    )
+    low, high = scoped_positions(answer_id, guess_id, index or verse_index(translation))
 
-    verses = resp.fetchone().count
+    # every verse from low up to (not including) high
+    verses = high - low
 
     return {"percent": (verses / total_verses) * 10**2, "count": verses, "unit": "verses"}
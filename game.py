@@ -0,0 +1,140 @@
+from collections import OrderedDict
+from os import environ
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+from configuration import DEFAULT_TRANSLATION, ContextBoundary, Difficulty
+from distance import (
+    percent_between,
+    row_ids,
+    verse_id,
+    distance_between_books,
+    distance_between_chapters,
+    distance_between_verses,
+)
+from lookups import LoadedTranslation, random_verse_from_category, verse_by_id
+from state import Guess, guess_done
+from verse import Verse, VerseWithText
+
+# scored guesses kept per (translation, answer id, guess id), shared by every player in the process
+GUESS_CACHE_SIZE = int(environ.get("SWORDDRILL_GUESS_CACHE", 65536))
+
+
+def new_answer(
+    categories: List[int], difficulty: int = Difficulty.Any.value, translation: str = DEFAULT_TRANSLATION
+) -> VerseWithText:
+    # the context is looked up when the verse is shown, with the boundary chosen then
+    return random_verse_from_category(categories, difficulty, translation)
+
+
+def score_guess(
+    answer: Verse, guess: Verse, translation: str = DEFAULT_TRANSLATION, loaded: Optional[LoadedTranslation] = None
+) -> Guess:
+    cat, index = (loaded.catalog, loaded.index) if loaded else (None, None)
+    answer_id, guess_id = row_ids(answer, guess, translation, cat)
+    text_percent, direction = percent_between(answer_id, guess_id, translation, index)
+
+    distance_away_books = distance_between_books(answer_id, guess_id, translation, cat, index)
+    distance_away_chapters = distance_between_chapters(answer_id, guess_id, answer["book"], translation, cat, index)
+    distance_away_verse = distance_between_verses(
+        answer_id, guess_id, answer["book"], answer["chapter"], translation, cat, index
+    )
+
+    book_found = guess["book"] == answer["book"]
+    chapter_found = guess["chapter"] == answer["chapter"]
+    verse_found = guess["verse"] == answer["verse"]
+
+    new_guess: Guess = {
+        "book": guess["book"],
+        "chapter": guess["chapter"],
+        "verse": guess["verse"],
+        "icon": "arrow_back" if direction == "higher" else "arrow_forward",
+        "percent": text_percent,
+        "distance_away_books": distance_away_books,
+        "distance_away_chapters": distance_away_chapters,
+        "distance_away_verses": distance_away_verse,
+        "book_found": book_found,
+        "chapter_found": book_found and chapter_found,
+        "verse_found": book_found and chapter_found and verse_found,
+    }  # type: ignore
+
+    if guess_done(new_guess):
+        new_guess["icon"] = "emoji_events"
+
+    return new_guess
+
+
+class GuessCache:
+    """Scored guesses, least recently used dropped first; the returned guesses are shared and must not be changed."""
+
+    def __init__(self, size: int = GUESS_CACHE_SIZE):
+        self.size = size
+        self._guesses: "OrderedDict[Tuple[str, int, int], Guess]" = OrderedDict()
+        self._lock = Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def score(
+        self,
+        answer_id: int,
+        guess_id: int,
+        translation: str = DEFAULT_TRANSLATION,
+        loaded: Optional[LoadedTranslation] = None,
+    ) -> Guess:
+        key = (translation, answer_id, guess_id)
+
+        with self._lock:
+            guess = self._guesses.get(key)
+            if guess is not None:
+                self._guesses.move_to_end(key)
+                self._stats["hits"] += 1
+                return guess
+            self._stats["misses"] += 1
+
+        guess = score_guess(
+            verse_by_id(answer_id, translation, loaded), verse_by_id(guess_id, translation, loaded), translation, loaded
+        )
+
+        with self._lock:
+            self._guesses[key] = guess
+            while len(self._guesses) > self.size:
+                self._guesses.popitem(last=False)
+                self._stats["evictions"] += 1
+
+        return guess
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            requests = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": self._stats["hits"] / requests if requests else 0.0,
+                "size": len(self._guesses),
+            }
+
+
+scored_guesses = GuessCache()
+
+
+def score_guesses(
+    answer_id: int,
+    guess_ids: List[int],
+    translation: str = DEFAULT_TRANSLATION,
+    loaded: Optional[LoadedTranslation] = None,
+) -> List[Guess]:
+    return [scored_guesses.score(answer_id, guess_id, translation, loaded) for guess_id in guess_ids]
+
+
+def migrate_state(state: dict) -> dict:
+    # version 12 stored the answer, its context and every scored guess in full
+    if state.get("version") == 12:
+        answer = state.pop("answer")
+        pre_context = state.pop("answer_pre_context", [])
+        post_context = state.pop("answer_post_context", [])
+
+        state["answer_id"] = verse_id(answer)
+        state["answer_context_count"] = max(len(pre_context), len(post_context))
+        state["answer_context_boundary"] = ContextBoundary.Bible.value
+        state["guesses"] = [verse_id(guess) for guess in state.get("guesses", [])]
+        state["version"] = 13
+
+    return state
@@ -0,0 +1,244 @@
+"""Build bible.db from a verse dump, one verse per line or record, in reading order.
+
+    python importer.py kjv.tsv [bible.db]
+    python importer.py asv.tsv [bible.db] --translation asv   add another translation to an existing database
+
+Accepted formats, by extension:
+    .tsv / .txt   book<TAB>chapter<TAB>verse<TAB>text, a header line is skipped
+    .jsonl        {"book": ..., "chapter": ..., "verse": ..., "text": ...} per line
+    .json         a list of those objects, or a resultset dump:
+                  {"resultset": {"row": [{"field": [id, book, chapter, verse, text]}, ...]}}
+
+book is a title ("1 Corinthians"), a common abbreviation ("1 Cor") or the book number 1-66.
+The database is written next to the output and moved into place once complete; another
+translation is added to the existing database in one transaction. Either marks the database
+with a new user_version, so corpus files exported before no longer load; export them again
+with corpus.py and restart the server afterwards.
+"""
+import json
+import re
+from argparse import ArgumentParser
+from itertools import islice
+from os import path, remove, replace
+from random import randrange
+from sqlite3 import connect
+from typing import Dict, Iterable, Iterator, Tuple
+
+from configuration import DEFAULT_TRANSLATION
+from references import ABBREVIATIONS, normalize
+from schema import migrate
+from search import build_search_index, fts_table
+from synthetic import BOOKS, create_schema, create_verse_table
+
+BATCH_SIZE = 10000
+CHUNK_SIZE = 1024 * 1024
+# translations are table names, so only plain lowercase names are accepted
+TRANSLATION_NAME = re.compile(r"[a-z][a-z0-9_]*")
+
+VerseRow = Tuple[int, int, int, str]
+
+
+def book_numbers() -> Dict[str, int]:
+    numbers = {}
+    for order, (title, _, _) in enumerate(BOOKS, start=1):
+        numbers[str(order)] = order
+        numbers[normalize(title)] = order
+        for abbreviation in ABBREVIATIONS.get(title, []):
+            numbers[normalize(abbreviation)] = order
+    return numbers
+
+
+def book_number(book, numbers: Dict[str, int]) -> int:
+    key = normalize(str(book))
+    if key in numbers:
+        return numbers[key]
+
+    # an unambiguous start of a title, as the guess form accepts
+    matches = {order for name, order in numbers.items() if name.startswith(key) and not name.isdigit()}
+    if len(matches) == 1:
+        return matches.pop()
+    raise ValueError(f"unknown book {book!r}")
+
+
+def read_tsv(filename: str) -> Iterator[tuple]:
+    with open(filename, encoding="utf-8") as f:
+        for line in f:
+            fields = line.rstrip("\r\n").split("\t")
+            if len(fields) >= 4 and fields[1].strip().isdigit():
+                yield fields[0], fields[1], fields[2], "\t".join(fields[3:])
+
+
+def read_jsonl(filename: str) -> Iterator[tuple]:
+    with open(filename, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                yield record["book"], record["chapter"], record["verse"], record["text"]
+
+
+LIST_START = re.compile(r"\s*\[")
+RESULTSET_START = re.compile(r'"row"\s*:\s*\[')
+SEPARATOR = re.compile(r"[\s,]*")
+
+
+def json_array_items(f, start: "re.Pattern[str]") -> Iterator:
+    """Decode the objects of the array opened by start one at a time, reading the file in chunks."""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    match = None
+    while match is None:
+        chunk = f.read(CHUNK_SIZE)
+        if not chunk:
+            raise ValueError("no array of verses found")
+        buffer += chunk
+        match = start.search(buffer)
+
+    position = match.end()
+    while True:
+        position = SEPARATOR.match(buffer, position).end()
+        if buffer.startswith("]", position):
+            return
+
+        try:
+            item, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            # the next object continues in the next chunk
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                raise
+            buffer = buffer[position:] + chunk
+            position = 0
+            continue
+
+        yield item
+
+
+def read_json(filename: str) -> Iterator[tuple]:
+    with open(filename, encoding="utf-8") as f:
+        resultset = f.read(CHUNK_SIZE).lstrip().startswith("{")
+        f.seek(0)
+
+        if resultset:
+            for row in json_array_items(f, RESULTSET_START):
+                _, book, chapter, verse, text = row["field"]
+                yield book, chapter, verse, text
+        else:
+            for record in json_array_items(f, LIST_START):
+                yield record["book"], record["chapter"], record["verse"], record["text"]
+
+
+READERS = {".tsv": read_tsv, ".txt": read_tsv, ".jsonl": read_jsonl, ".json": read_json}
+
+
+def verse_rows(records: Iterable[tuple]) -> Iterator[VerseRow]:
+    numbers = book_numbers()
+    orders: Dict[object, int] = {}
+    for book, chapter, verse, text in records:
+        order = orders.get(book)
+        if order is None:
+            order = orders[book] = book_number(book, numbers)
+        yield order, int(chapter), int(verse), " ".join(str(text).split())
+
+
+def batches(rows: Iterable[VerseRow]) -> Iterator[list]:
+    # ids count up from 1 in reading order, len is the length of the stored text
+    numbered = ((id, book, chapter, verse, text, len(text)) for id, (book, chapter, verse, text) in enumerate(rows, 1))
+    while True:
+        batch = list(islice(numbered, BATCH_SIZE))
+        if not batch:
+            return
+        yield batch
+
+
+def insert_verses(conn, table: str, records: Iterable[tuple]) -> int:
+    count = 0
+    for batch in batches(verse_rows(records)):
+        conn.executemany(f"INSERT INTO `{table}` VALUES (?, ?, ?, ?, ?, ?);", batch)
+        count += len(batch)
+    return count
+
+
+def stamp(conn):
+    # corpus files record the user_version they were exported from, and are ignored once it changes
+    conn.execute(f"PRAGMA user_version = {randrange(1, 2**31)};")
+
+
+def add_translation(records: Iterable[tuple], output: str, translation: str) -> int:
+    if not TRANSLATION_NAME.fullmatch(translation) or translation.endswith("_fts"):
+        raise ValueError(f"invalid translation name {translation!r}")
+    if not path.exists(output):
+        raise ValueError(f"{output} does not exist, import the {DEFAULT_TRANSLATION} text first")
+
+    conn = connect(output, isolation_level=None)
+    conn.execute("BEGIN;")
+    conn.execute(f"DROP TABLE IF EXISTS {fts_table(translation)};")
+    conn.execute(f"DROP TABLE IF EXISTS `{translation}`;")
+    create_verse_table(conn, translation)
+    count = insert_verses(conn, translation, records)
+    stamp(conn)
+    conn.execute("COMMIT;")
+
+    conn.execute(f"CREATE INDEX idx_{translation}_book_chapter_verse ON `{translation}` (book, chapter, verse);")
+    build_search_index(conn, translation)
+    conn.execute("ANALYZE;")
+    conn.close()
+
+    return count
+
+
+def build(source: str, output: str, translation: str = DEFAULT_TRANSLATION) -> int:
+    reader = READERS.get(path.splitext(source)[1].lower())
+    if reader is None:
+        raise ValueError(f"unsupported format {source}, expected one of {', '.join(READERS)}")
+
+    if translation != DEFAULT_TRANSLATION:
+        return add_translation(reader(source), output, translation)
+
+    building = output + ".building"
+    if path.exists(building):
+        remove(building)
+
+    conn = connect(building, isolation_level=None)
+    # nothing reads the file until it is moved into place, a failed build is simply started over
+    conn.execute("PRAGMA journal_mode = OFF;")
+    conn.execute("PRAGMA synchronous = OFF;")
+    create_schema(conn)
+
+    conn.execute("BEGIN;")
+    for order, (title, chapters, category) in enumerate(BOOKS, start=1):
+        testament = "OT" if order <= 39 else "NT"
+        conn.execute(
+            "INSERT INTO book_info VALUES (?, ?, ?, ?, ?, ?, ?);",
+            (order, title, f"The Book of {title}", title[:3], str(category), testament, chapters),
+        )
+        conn.execute("INSERT INTO key_english VALUES (?, ?, ?, ?);", (order, title, testament, category))
+
+    count = insert_verses(conn, DEFAULT_TRANSLATION, reader(source))
+
+    # chapter counts follow the imported text where it has the book
+    conn.execute(
+        """
+        UPDATE book_info
+           SET chapters = (SELECT max(k.chapter) FROM kjv AS k WHERE k.book = book_info.`order`)
+         WHERE EXISTS (SELECT 1 FROM kjv AS k WHERE k.book = book_info.`order`);
+        """
+    )
+    stamp(conn)
+    conn.execute("COMMIT;")
+
+    # indexes, the full-text index and ANALYZE last, over the complete tables
+    migrate(conn)
+    conn.close()
+
+    replace(building, output)
+    return count
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="build bible.db from a verse dump")
+    parser.add_argument("source")
+    parser.add_argument("output", nargs="?", default="bible.db")
+    parser.add_argument("--translation", default=DEFAULT_TRANSLATION)
+    args = parser.parse_args()
+
+    print(f"{build(args.source, args.output, args.translation)} verses written to {args.output}")
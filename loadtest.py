@@ -0,0 +1,317 @@
+"""Simulate many concurrent players against a locally running server.
+
+    python loadtest.py --players 1000 --duration 60 --mode api --output loadtest.json
+    python loadtest.py --players 200 --mode game --server-pid $(pgrep -f server.py)
+
+--mode api plays through the headless /api endpoints. --mode game loads /game like a
+browser, holds its websocket open and clicks through the page; that needs the
+python-socketio client (pip install "python-socketio[asyncio_client]").
+Game actions are timed until the server's update for them arrives. Non-200 responses
+and updates that never come count as errors, not as samples.
+Results (throughput, p50/p99 per action, server memory growth) are written as JSON.
+"""
+import asyncio
+import json
+import re
+from argparse import ArgumentParser
+from random import Random
+from time import perf_counter, time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from uuid import uuid4
+
+# book/chapter/verse triples that exist in every bible.db, real or synthetic
+GUESSES = [("Genesis", 1, 1), ("Psalms", 23, 1), ("Isaiah", 40, 1), ("Matthew", 5, 3), ("John", 3, 16)]
+# seconds to wait for the page to update after an event
+UPDATE_TIMEOUT = 10
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+
+    def record(self, action: str, seconds: float, ok: bool = True):
+        if ok:
+            self.latencies.setdefault(action, []).append(seconds)
+        else:
+            self.errors[action] = self.errors.get(action, 0) + 1
+
+    def summary(self, elapsed: float) -> Dict[str, dict]:
+        result = {}
+        for action in sorted(set(self.latencies) | set(self.errors)):
+            samples = sorted(self.latencies.get(action, []))
+            result[action] = {
+                "count": len(samples),
+                "errors": self.errors.get(action, 0),
+                "throughput": len(samples) / elapsed,
+                "p50_ms": percentile(samples, 0.5) * 1000,
+                "p99_ms": percentile(samples, 0.99) * 1000,
+            }
+        return result
+
+
+def percentile(samples: List[float], q: float) -> float:
+    if not samples:
+        return 0.0
+    return samples[min(int(q * len(samples)), len(samples) - 1)]
+
+
+def rss_kib(pid: Optional[int]) -> Optional[int]:
+    if pid is None:
+        return None
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return None
+
+
+async def http(
+    host: str, port: int, method: str, path: str, body: Optional[dict] = None, cookies: Optional[Dict[str, str]] = None
+) -> Tuple[int, str]:
+    """A minimal HTTP/1.1 request over a fresh connection, so the tool needs nothing beyond the stdlib."""
+    reader, writer = await asyncio.open_connection(host, port)
+    payload = json.dumps(body).encode() if body is not None else b""
+    headers = [f"{method} {path} HTTP/1.1", f"Host: {host}:{port}", "Connection: close"]
+    if body is not None:
+        headers += ["Content-Type: application/json", f"Content-Length: {len(payload)}"]
+    if cookies:
+        headers.append("Cookie: " + "; ".join(f"{key}={value}" for key, value in cookies.items()))
+    writer.write(("\r\n".join(headers) + "\r\n\r\n").encode() + payload)
+    await writer.drain()
+
+    response = await reader.read()
+    writer.close()
+
+    head, _, content = response.partition(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    if cookies is not None:
+        for line in lines[1:]:
+            if line.lower().startswith("set-cookie:"):
+                key, _, value = line.split(":", 1)[1].strip().split(";")[0].partition("=")
+                cookies[key] = value
+
+    return int(lines[0].split()[1]), content.decode("utf-8", "replace")
+
+
+def succeeded(response: Tuple[int, str]) -> bool:
+    return response[0] == 200
+
+
+async def timed(recorder: Recorder, action: str, coroutine, ok: Callable[[Any], bool] = lambda result: True):
+    start = perf_counter()
+    try:
+        result = await coroutine
+    except Exception:
+        recorder.record(action, perf_counter() - start, ok=False)
+        return None
+    recorder.record(action, perf_counter() - start, ok(result))
+    return result
+
+
+async def api_player(host: str, port: int, recorder: Recorder, random: Random, deadline: float):
+    while time() < deadline:
+        response = await timed(recorder, "api_start", http(host, port, "POST", "/api/games", {}), succeeded)
+        if response is None or response[0] != 200:
+            await asyncio.sleep(1)
+            continue
+
+        game = json.loads(response[1])
+        while game["status"] == "playing" and time() < deadline:
+            book, chapter, verse = random.choice(GUESSES)
+            guess = {"book": book, "chapter": chapter, "verse": verse}
+            response = await timed(
+                recorder,
+                "api_guess",
+                http(host, port, "POST", f"/api/games/{game['game_id']}/guesses", guess),
+                succeeded,
+            )
+            if response is None or response[0] != 200:
+                break
+            game = json.loads(response[1])
+
+        await timed(recorder, "api_state", http(host, port, "GET", f"/api/games/{game['game_id']}"), succeeded)
+
+
+def page_elements(page: str) -> Tuple[Optional[str], Dict[str, dict]]:
+    """The client id and element tree NiceGUI embeds in a rendered page."""
+    match = re.search(r"""query: \{.*?["']client_id["']: ["']([^"']+)["']""", page)
+    client_id = match.group(1) if match else None
+
+    match = re.search(r"parseElements\(String\.raw`(.*?)`\)", page, re.DOTALL)
+    elements = {}
+    if match:
+        raw = match.group(1)
+        for escaped, char in [("&#36;", "$"), ("&#96;", "`"), ("&gt;", ">"), ("&lt;", "<"), ("&amp;", "&")]:
+            raw = raw.replace(escaped, char)
+        elements = json.loads(raw)
+    return client_id, elements
+
+
+def listeners(element: dict, event_type: str) -> List[str]:
+    return [listener["listener_id"] for listener in element.get("events", []) if listener.get("type") == event_type]
+
+
+def find_button(elements: Dict[str, dict], prop: str, value: str) -> Optional[str]:
+    for element_id, element in elements.items():
+        if element.get("tag") == "q-btn" and element.get("props", {}).get(prop) == value:
+            return element_id
+    return None
+
+
+def guess_selects(elements: Dict[str, dict], guess_id: str) -> List[str]:
+    """The book, chapter and verse selects, in the row holding the Guess button."""
+    for element in elements.values():
+        children = [str(child) for child in element.get("children", [])]
+        if guess_id in children:
+            return [child for child in children if elements.get(child, {}).get("tag") == "nicegui-select"]
+    return []
+
+
+async def game_player(host: str, port: int, recorder: Recorder, random: Random, deadline: float):
+    import socketio
+
+    cookies: Dict[str, str] = {}
+    response = await timed(recorder, "game_page", http(host, port, "GET", "/game", cookies=cookies), succeeded)
+    if response is None or response[0] != 200:
+        return
+
+    client_id, elements = page_elements(response[1])
+    sio = socketio.AsyncClient()
+    updated = asyncio.Event()
+
+    @sio.on("update")
+    def on_update(changes: Dict[str, Optional[dict]]):
+        # keep the element tree current like the browser does, so options and disabled states are the latest
+        for element_id, element in changes.items():
+            if element is None:
+                elements.pop(element_id, None)
+            else:
+                elements[element_id] = element
+        updated.set()
+
+    async def connect() -> bool:
+        await sio.connect(
+            f"http://{host}:{port}?client_id={client_id}",
+            socketio_path="/_nicegui_ws/socket.io",
+            transports=["websocket"],
+            headers={"Cookie": "; ".join(f"{key}={value}" for key, value in cookies.items())},
+        )
+        # events are only handled, and updates only sent, once the client has introduced itself
+        return await sio.call("handshake", {"client_id": client_id, "tab_id": uuid4().hex}, timeout=UPDATE_TIMEOUT)
+
+    async def round_trip(element_id: str, event_type: str, args: list):
+        # as the page does: one event per listener, each argument encoded as a json string
+        updated.clear()
+        for listener_id in listeners(elements[element_id], event_type):
+            event = {"id": int(element_id), "client_id": client_id, "listener_id": listener_id}
+            await sio.emit("event", {**event, "args": [json.dumps(arg) for arg in args]})
+        await asyncio.wait_for(updated.wait(), UPDATE_TIMEOUT)
+
+    if not await timed(recorder, "game_connect", connect(), bool):
+        if sio.connected:
+            await sio.disconnect()
+        return
+
+    try:
+        while time() < deadline:
+            guess = find_button(elements, "label", "Guess")
+            if guess is None:
+                break
+
+            # a disabled select or its current value changes nothing, and no update would come back
+            choices = [
+                (select, option)
+                for select in guess_selects(elements, guess)
+                if not elements[select]["props"].get("disable")
+                for option in elements[select]["props"].get("options", [])
+                if option != elements[select]["props"].get("model-value")
+            ]
+            if choices:
+                select, option = random.choice(choices)
+                await timed(recorder, "game_select", round_trip(select, "update:modelValue", [option]))
+
+            if not elements[guess]["props"].get("disable"):
+                await timed(recorder, "game_guess", round_trip(guess, "click", []))
+            else:
+                # out of guesses, start the next verse as a player would
+                replay = find_button(elements, "icon", "replay")
+                if replay is not None:
+                    await timed(recorder, "game_reset", round_trip(replay, "click", []))
+
+            await asyncio.sleep(random.uniform(0.5, 2.0))
+    finally:
+        await sio.disconnect()
+
+
+async def run(args) -> dict:
+    recorder = Recorder()
+    deadline = time() + args.duration
+    player = api_player if args.mode == "api" else game_player
+    rss_before = rss_kib(args.server_pid)
+
+    async def staggered(index: int):
+        # spread connection setup over the ramp-up period
+        await asyncio.sleep(args.ramp_up * index / max(args.players, 1))
+        await player(args.host, args.port, recorder, Random(index), deadline)
+
+    start = perf_counter()
+    rss_peak = rss_before
+
+    async def sample_memory():
+        nonlocal rss_peak
+        while time() < deadline:
+            rss = rss_kib(args.server_pid)
+            if rss is not None and rss_peak is not None:
+                rss_peak = max(rss_peak, rss)
+            await asyncio.sleep(1)
+
+    await asyncio.gather(sample_memory(), *(staggered(i) for i in range(args.players)))
+    elapsed = perf_counter() - start
+    rss_after = rss_kib(args.server_pid)
+
+    memory = None
+    if rss_before is not None and rss_after is not None and rss_peak is not None:
+        memory = {
+            "rss_before_kib": rss_before,
+            "rss_peak_kib": rss_peak,
+            "rss_after_kib": rss_after,
+            "growth_per_session_kib": (rss_peak - rss_before) / max(args.players, 1),
+        }
+
+    return {
+        "mode": args.mode,
+        "players": args.players,
+        "duration_s": elapsed,
+        "actions": recorder.summary(elapsed),
+        "memory": memory,
+    }
+
+
+def main():
+    parser = ArgumentParser(description="load test a running sworddrill server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--players", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--ramp-up", type=float, default=5)
+    parser.add_argument("--mode", choices=["api", "game"], default="api")
+    parser.add_argument("--server-pid", type=int, help="server process to sample memory from")
+    parser.add_argument("--output", default="loadtest.json")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    for action, stats in results["actions"].items():
+        print(
+            f"{action:<14} {stats['count']:>8} ok {stats['errors']:>6} err "
+            f"{stats['throughput']:>9.1f}/s p50 {stats['p50_ms']:8.2f}ms p99 {stats['p99_ms']:8.2f}ms"
+        )
+    if results["memory"]:
+        print(f"server memory growth: {results['memory']['growth_per_session_kib']:.1f} KiB per session")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,43 +1,39 @@
-from collections import namedtuple
+from collections import OrderedDict
 from functools import lru_cache
-from sqlite3 import connect, Connection, Cursor
-from typing import List
+from sqlite3 import Connection
+from threading import Lock
+from typing import List, Mapping, NamedTuple, Optional, Tuple
 from random import randint
-from verse import Verse, VerseWithText
-
-
-def namedtuple_factory(cursor: Cursor, row):
-    fields = [column[0] for column in cursor.description]
-    cls = namedtuple("NamedRow", fields)
-    return cls._make(row)
-
-
-def get_connection():
-    conn = connect("bible.db")
-    conn.row_factory = namedtuple_factory
-    return conn
-
-
-@lru_cache(maxsize=1)
-def verse_count() -> int:
+from catalog import Catalog, catalog
+from configuration import DEFAULT_TRANSLATION, ContextBoundary, Difficulty
+from corpus import open_corpus
+from database import get_connection
+from distance import VerseIndex, verse_index
+from translations import MAX_LOADED, verse_table
+from verse import VerseWithText
+from workers import run_blocking
+
+
+@lru_cache(maxsize=MAX_LOADED)
+def verse_count(translation: str = DEFAULT_TRANSLATION) -> int:
     conn = get_connection()
     resp = conn.execute(
-        """
+        f"""
         SELECT max(k.id) AS count
-          FROM kjv AS k;
+          FROM `{verse_table(translation)}` AS k;
         """
     )
     return resp.fetchone().count
 
 
-def random_verse(conn: Connection) -> VerseWithText:
-    max_verse = verse_count()
+def random_verse(conn: Connection, translation: str = DEFAULT_TRANSLATION) -> VerseWithText:
+    max_verse = verse_count(translation)
     r = randint(1, max_verse)
 
     resp = conn.execute(
-        """
+        f"""
         SELECT bi.title_short AS book, k.chapter, k.verse, k.text
-          FROM kjv AS k
+          FROM `{verse_table(translation)}` AS k
             LEFT JOIN book_info AS bi ON bi.`order` = k.book
          WHERE k.id = ?;
         """,
@@ -54,136 +50,138 @@ def random_verse(conn: Connection) -> VerseWithText:
     return verse
 
 
-def random_verse_from_category(conn: Connection, categories: List[int]) -> VerseWithText:
-    resp = conn.execute(
-        f"""
-        SELECT count(*) AS count
-          FROM kjv AS k
-            LEFT JOIN key_english AS ke ON ke.b = k.book
-            LEFT JOIN book_info AS bi ON bi.`order` = k.book
-         WHERE ke.g in ({','.join('?' * len(categories))})
-        """,
-        categories,
-    ).fetchone()
-
-    count = resp.count
-    r = randint(0, count - 1)
+def random_verse_id_from_category(
+    categories: List[int], difficulty: int = Difficulty.Any.value, translation: str = DEFAULT_TRANSLATION
+) -> int:
+    cat = catalog(translation)
 
-    resp = conn.execute(
-        f"""
-        SELECT bi.title_short AS book, k.chapter, k.verse, k.text
-          FROM kjv AS k
-            LEFT JOIN key_english AS ke ON ke.b = k.book
-            LEFT JOIN book_info AS bi ON bi.`order` = k.book
-         WHERE ke.g in ({','.join('?' * len(categories))})
-         LIMIT ?, 1
-        """,
-        categories + [r],
-    ).fetchone()
+    if difficulty != Difficulty.Any.value:
+        # numpy is only needed once a difficulty is chosen
+        from par import difficulty_positions
 
-    verse: VerseWithText = {
-        "book": resp.book,
-        "chapter": resp.chapter,
-        "verse": resp.verse,
-        "text": resp.text,
-    }  # type: ignore
+        positions = difficulty_positions(tuple(sorted(set(categories))), difficulty, translation)
+        return cat.verse_ids[positions[randint(0, len(positions) - 1)]]
 
-    return verse
+    ranges = [r for category in set(categories) for r in cat.category_ranges.get(category, [])]
 
+    count = sum(stop - start for start, stop in ranges)
+    r = randint(0, count - 1)
 
-def context_verses(conn: Connection, verse: Verse, count: int, after: bool) -> List[VerseWithText]:
-    if count == 0:
-        return []
+    for start, stop in ranges:
+        if r < stop - start:
+            return cat.verse_ids[start + r]
+        r -= stop - start
 
-    answer_id = conn.execute(
-        f"""
-        SELECT k.id
-          FROM kjv AS k
-            LEFT JOIN book_info AS bi ON bi.`order` = k.book
-         WHERE bi.title_short = ?
-           AND k.chapter = ? 
-           AND k.verse = ? 
-        """,
-        (
-            verse["book"],
-            verse["chapter"],
-            verse["verse"],
-        ),
-    ).fetchone()[0]
-
-    context_records = conn.execute(
-        f"""
-        SELECT bi.title_short, k.chapter, k.verse, k.text
-          FROM kjv AS k
-            LEFT JOIN book_info AS bi ON bi.`order` = k.book
-         WHERE k.id {'>' if after else '<'} ? 
-          ORDER BY k.id {'ASC' if after else 'DESC'}
-          LIMIT ?;
-        """,
-        (
-            answer_id,
-            count,
-        ),
-    ).fetchall()
+    raise IndexError(r)
 
-    context_list = [{"book": r[0], "chapter": r[1], "verse": r[2], "text": r[3]} for r in context_records]
 
-    # if len(context_list) == 0:
-    #     pass
+def random_verse_from_category(
+    categories: List[int], difficulty: int = Difficulty.Any.value, translation: str = DEFAULT_TRANSLATION
+) -> VerseWithText:
+    return verse_by_id(random_verse_id_from_category(categories, difficulty, translation), translation)
 
-    return context_list  # type: ignore
 
+@lru_cache(maxsize=MAX_LOADED)
+def texts(translation: str = DEFAULT_TRANSLATION) -> Mapping[int, str]:
+    corpus = open_corpus(translation)
+    if corpus is not None:
+        return corpus.texts  # type: ignore
 
-@lru_cache(maxsize=1)
-def books() -> List[str]:
     conn = get_connection()
     resp = conn.execute(
-        """
-        SELECT DISTINCT bi.title_short AS book
-          FROM book_info AS bi
-         ORDER BY bi.`order` ASC;
+        f"""
+        SELECT k.id, k.text
+          FROM `{verse_table(translation)}` AS k;
         """
     )
-    book_list = [r.book for r in resp.fetchall()]
-    conn.close()
+    return dict(resp.fetchall())
 
-    return book_list
 
+class LoadedTranslation(NamedTuple):
+    catalog: Catalog
+    index: VerseIndex
+    texts: Mapping[int, str]
 
-@lru_cache(maxsize=None)
-def chapters(book: str) -> List[int]:
-    conn = get_connection()
-    resp = conn.execute(
-        """
-        SELECT DISTINCT k.chapter
-          FROM kjv AS k
-            LEFT JOIN book_info AS bi ON bi.`order` = k.book
-         WHERE bi.title_short = ?
-         ORDER BY k.chapter ASC;
-        """,
-        (book,),
-    )
-    chapter_list = [r.chapter for r in resp.fetchall()]
-    conn.close()
 
-    return chapter_list
+# held here as well, so a translation evicted from the caches above by another worker stays usable by its holder
+_loaded: "OrderedDict[str, LoadedTranslation]" = OrderedDict()
+_loaded_lock = Lock()
 
 
-@lru_cache(maxsize=None)
-def verses(book: str, chapter: str) -> List[int]:
-    conn = get_connection()
-    resp = conn.execute(
-        """
-        SELECT DISTINCT k.verse
-          FROM kjv AS k
-            LEFT JOIN book_info AS bi ON bi.`order` = k.book
-         WHERE bi.title_short = ?
-           AND k.chapter = ?
-         ORDER BY k.verse ASC;
-        """,
-        (book, chapter),
-    )
-    verse_list = [r.verse for r in resp.fetchall()]
-    conn.close()
+def load_translation(translation: str = DEFAULT_TRANSLATION) -> LoadedTranslation:
+    """Build the catalog, verse index and texts of translation unless they are still loaded."""
+    loaded = LoadedTranslation(catalog(translation), verse_index(translation), texts(translation))
+    with _loaded_lock:
+        _loaded[translation] = loaded
+        _loaded.move_to_end(translation)
+        while len(_loaded) > MAX_LOADED:
+            _loaded.popitem(last=False)
+    return loaded
+
+
+def loaded_translation(translation: str = DEFAULT_TRANSLATION) -> Optional[LoadedTranslation]:
+    with _loaded_lock:
+        loaded = _loaded.get(translation)
+        if loaded is not None:
+            _loaded.move_to_end(translation)
+        return loaded
+
+
+async def use_translation(translation: str = DEFAULT_TRANSLATION) -> LoadedTranslation:
+    # only a translation that isn't loaded goes to a worker, it takes a few hundred ms and must not block the event loop
+    loaded = loaded_translation(translation)
+    if loaded is None:
+        loaded = await run_blocking(load_translation, translation)
+    return loaded
+
+
+def verse_by_id(
+    verse_id: int, translation: str = DEFAULT_TRANSLATION, loaded: Optional[LoadedTranslation] = None
+) -> VerseWithText:
+    cat, verse_texts = (loaded.catalog, loaded.texts) if loaded else (catalog(translation), texts(translation))
+    book, chapter, verse = cat.references[verse_id]
+    return {"book": book, "chapter": chapter, "verse": verse, "text": verse_texts[verse_id]}  # type: ignore
+
+
+def context_window(
+    verse_id: int, count: int, boundary: int = ContextBoundary.Bible.value, translation: str = DEFAULT_TRANSLATION
+) -> Tuple[List[VerseWithText], List[VerseWithText]]:
+    """Return the verses before (nearest first) and after verse_id, optionally kept within its book or chapter."""
+    verse_ids = catalog(translation).verse_ids
+    index = verse_index(translation)
+    position = index.positions[verse_id]
+
+    low = max(position - count, 0)
+    high = min(position + count + 1, len(verse_ids))
+
+    ordinal = None
+    if boundary == ContextBoundary.Book.value:
+        ordinal = index.book_ordinal
+    elif boundary == ContextBoundary.Chapter.value:
+        ordinal = index.chapter_ordinal
+
+    if ordinal is not None:
+        while ordinal[low] != ordinal[position]:
+            low += 1
+        while ordinal[high - 1] != ordinal[position]:
+            high -= 1
+
+    window = [verse_by_id(context_id, translation) for context_id in verse_ids[low:high]]
+    offset = position - low
+
+    return window[offset - 1 :: -1] if offset else [], window[offset + 1 :]
+
+
+def books(translation: str = DEFAULT_TRANSLATION) -> List[str]:
+    return catalog(translation).books
+
+
+def chapters(book: str, translation: str = DEFAULT_TRANSLATION) -> List[int]:
+    return catalog(translation).chapters.get(book, [])
+
+
+def verses(book: str, chapter: int, translation: str = DEFAULT_TRANSLATION) -> List[int]:
+    if chapter is None:
+        return []
 
-    return verse_list
+    return catalog(translation).verses.get((book, int(chapter)), [])
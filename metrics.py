@@ -0,0 +1,126 @@
+from collections import deque
+from functools import wraps
+from inspect import iscoroutinefunction
+from os import environ
+from sqlite3 import Connection, Cursor
+from sys import _getframe
+from threading import Lock
+from time import perf_counter
+from typing import Callable, Deque, Dict, List, Tuple
+
+# SWORDDRILL_METRICS=0 leaves every function and connection exactly as it is
+ENABLED = environ.get("SWORDDRILL_METRICS", "1") != "0"
+# recent samples kept per histogram for the quantiles
+SAMPLES = 2048
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Histogram:
+    def __init__(self):
+        self.count = 0
+        self.sum = 0.0
+        self.samples: Deque[float] = deque(maxlen=SAMPLES)
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.sum += seconds
+        self.samples.append(seconds)
+
+    def quantiles(self) -> List[Tuple[float, float]]:
+        ordered = sorted(self.samples)
+        if not ordered:
+            return [(q, 0.0) for q in QUANTILES]
+        return [(q, ordered[min(int(q * len(ordered)), len(ordered) - 1)]) for q in QUANTILES]
+
+
+_lock = Lock()
+_histograms: Dict[Tuple[str, str], Histogram] = {}
+
+
+def observe(kind: str, name: str, seconds: float):
+    with _lock:
+        histogram = _histograms.get((kind, name))
+        if histogram is None:
+            histogram = _histograms[(kind, name)] = Histogram()
+        histogram.observe(seconds)
+
+
+def timed(kind: str, name: str = "") -> Callable:
+    """Record how long each call of the decorated function (sync or async) takes."""
+
+    def decorator(fn):
+        if not ENABLED:
+            return fn
+
+        label = name or fn.__qualname__
+
+        if iscoroutinefunction(fn):
+
+            @wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                start = perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    observe(kind, label, perf_counter() - start)
+
+            return async_wrapper
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                observe(kind, label, perf_counter() - start)
+
+        return wrapper
+
+    return decorator
+
+
+class TimedConnection(Connection):
+    """sqlite connection that records each statement under the name of the function running it."""
+
+    def execute(self, *args, **kwargs) -> Cursor:  # type: ignore
+        start = perf_counter()
+        try:
+            return super().execute(*args, **kwargs)
+        finally:
+            observe("sql", _getframe(1).f_code.co_name, perf_counter() - start)
+
+
+connection_factory = TimedConnection if ENABLED else Connection
+
+
+def _labels(name: str, **extra) -> str:
+    labels = {"name": name, **{key: str(value) for key, value in extra.items()}}
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels.items()) + "}"
+
+
+def render(counters: Dict[str, int], gauges: Dict[str, int]) -> str:
+    """Prometheus text exposition of every histogram plus the given counters and gauges."""
+    lines: List[str] = []
+
+    with _lock:
+        histograms = sorted(_histograms.items())
+        snapshots = [(key, histogram.count, histogram.sum, histogram.quantiles()) for key, histogram in histograms]
+
+    seen = set()
+    for (kind, name), count, total, quantiles in snapshots:
+        metric = f"sworddrill_{kind}_seconds"
+        if metric not in seen:
+            lines.append(f"# TYPE {metric} summary")
+            seen.add(metric)
+
+        for q, value in quantiles:
+            lines.append(f"{metric}{_labels(name, quantile=q)} {value}")
+        lines.append(f"{metric}_sum{_labels(name)} {total}")
+        lines.append(f"{metric}_count{_labels(name)} {count}")
+
+    for kind, values in (("counter", counters), ("gauge", gauges)):
+        for name, value in values.items():
+            lines.append(f"# TYPE sworddrill_{name} {kind}")
+            lines.append(f"sworddrill_{name} {value}")
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,227 @@
+"""Par, the number of guesses a player needs for each verse when using every hint the game gives.
+
+    python par.py [--method ScopedPercentage]   print the par distribution and how long it took
+
+The player keeps the range of positions that agree with every arrow and distance hint
+shown so far and always guesses its middle verse. All answers are played at once as
+NumPy arrays, each round narrowing every range with a vectorized binary search.
+Difficulty tiers follow par, with ties broken by how large the range stayed.
+"""
+from argparse import ArgumentParser
+from functools import lru_cache
+from time import perf_counter
+from typing import NamedTuple, Tuple
+
+import numpy as np
+
+from catalog import catalog
+from configuration import DEFAULT_TRANSLATION, Difficulty, DistanceMethod
+from distance import verse_index
+from translations import MAX_LOADED
+
+BOOK, CHAPTER, VERSE = 0, 1, 2
+
+
+class Board(NamedTuple):
+    cumulative_len: np.ndarray
+    book_ordinal: np.ndarray
+    chapter_ordinal: np.ndarray
+    # [start, stop) positions of the book and chapter each position is in
+    book_start: np.ndarray
+    book_stop: np.ndarray
+    chapter_start: np.ndarray
+    chapter_stop: np.ndarray
+    # the totals the scoped percentages divide by
+    chapters_in_book: np.ndarray
+    verses_in_chapter: np.ndarray
+    books: int
+
+
+@lru_cache(maxsize=MAX_LOADED)
+def board(translation: str = DEFAULT_TRANSLATION) -> Board:
+    cat = catalog(translation)
+    index = verse_index(translation)
+
+    book_ordinal = np.asarray(index.book_ordinal, dtype=np.int64)
+    chapter_ordinal = np.asarray(index.chapter_ordinal, dtype=np.int64)
+    references = [cat.references[id] for id in cat.verse_ids]
+
+    return Board(
+        np.asarray(index.cumulative_len, dtype=np.int64),
+        book_ordinal,
+        chapter_ordinal,
+        np.searchsorted(book_ordinal, book_ordinal, side="left"),
+        np.searchsorted(book_ordinal, book_ordinal, side="right"),
+        np.searchsorted(chapter_ordinal, chapter_ordinal, side="left"),
+        np.searchsorted(chapter_ordinal, chapter_ordinal, side="right"),
+        np.array([cat.chapter_counts[book] for book, _, _ in references], dtype=np.int64),
+        np.array([max(cat.verses[(book, chapter)]) for book, chapter, _ in references], dtype=np.int64),
+        len(cat.books),
+    )
+
+
+def hint(b: Board, method: int, level: np.ndarray, guess: np.ndarray, x: np.ndarray) -> np.ndarray:
+    """The distance hint shown for guess when the answer is at x, rounded as the page displays it."""
+    low = np.minimum(guess, x)
+    high = np.maximum(guess, x)
+
+    if method == DistanceMethod.TextPercentage.value:
+        return np.round((b.cumulative_len[high] - b.cumulative_len[low + 1]) / b.cumulative_len[-1] * 100, 3)
+
+    # same counts as distance_between_books / _chapters / _verses
+    count = np.where(
+        level == BOOK,
+        b.book_ordinal[high - 1] - b.book_ordinal[low],
+        np.where(level == CHAPTER, b.chapter_ordinal[high - 1] - b.chapter_ordinal[low], high - low),
+    )
+    if method == DistanceMethod.ScopedCount.value:
+        return count
+
+    total = np.where(
+        level == BOOK, b.books, np.where(level == CHAPTER, b.chapters_in_book[guess], b.verses_in_chapter[guess])
+    )
+    return np.round(count / total * 100)
+
+
+def first(b: Board, low: np.ndarray, high: np.ndarray, predicate) -> np.ndarray:
+    """Smallest x in [low, high) where the monotone predicate holds, or high where it never does."""
+    low = low.copy()
+    high = high.copy()
+    last = len(b.book_ordinal) - 1
+
+    while True:
+        searching = low < high
+        if not searching.any():
+            return low
+
+        middle = np.clip((low + high) // 2, 0, last)
+        holds = predicate(middle)
+        high = np.where(searching & holds, middle, high)
+        low = np.where(searching & ~holds, middle + 1, low)
+
+
+def narrow(
+    b: Board, method: int, answer: np.ndarray, guess: np.ndarray, low: np.ndarray, high: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """The [low, high] range of positions that would have produced the same feedback as answer."""
+    level = np.where(
+        b.book_ordinal[answer] != b.book_ordinal[guess],
+        BOOK,
+        np.where(b.chapter_ordinal[answer] != b.chapter_ordinal[guess], CHAPTER, VERSE),
+    )
+    after = answer > guess
+
+    # positions on the same side of the guess with the same book_found / chapter_found
+    start = np.where(
+        after,
+        np.where(level == VERSE, guess + 1, np.where(level == CHAPTER, b.chapter_stop[guess], b.book_stop[guess])),
+        np.where(level == VERSE, b.chapter_start[guess], np.where(level == CHAPTER, b.book_start[guess], 0)),
+    )
+    stop = np.where(
+        after,
+        np.where(
+            level == VERSE, b.chapter_stop[guess], np.where(level == CHAPTER, b.book_stop[guess], len(b.book_ordinal))
+        ),
+        np.where(level == VERSE, guess, np.where(level == CHAPTER, b.chapter_start[guess], b.book_start[guess])),
+    )
+    start = np.maximum(start, low)
+    stop = np.minimum(stop, high + 1)
+
+    # hints grow with the distance from the guess, so flip them before the guess to search ascending keys
+    sign = np.where(after, 1, -1)
+    target = hint(b, method, level, guess, answer) * sign
+
+    def key(x):
+        return hint(b, method, level, guess, x) * sign
+
+    return first(b, start, stop, lambda x: key(x) >= target), first(b, start, stop, lambda x: key(x) > target) - 1
+
+
+@lru_cache(maxsize=len(DistanceMethod) * MAX_LOADED)
+def solve(
+    method: int = DistanceMethod.ScopedPercentage.value, translation: str = DEFAULT_TRANSLATION
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Guesses needed for the verse at each position, and the log2 of the verses still possible before each, summed."""
+    b = board(translation)
+    count = len(b.book_ordinal)
+
+    par = np.zeros(count, dtype=np.int16)
+    effort = np.zeros(count, dtype=np.float64)
+    answer = np.arange(count)
+    low = np.zeros(count, dtype=np.int64)
+    high = np.full(count, count - 1, dtype=np.int64)
+
+    guesses = 0
+    while len(answer):
+        guesses += 1
+        effort[answer] += np.log2(high - low + 1)
+        guess = (low + high) // 2
+
+        found = guess == answer
+        par[answer[found]] = guesses
+
+        playing = ~found
+        answer, guess, low, high = answer[playing], guess[playing], low[playing], high[playing]
+        low, high = narrow(b, method, answer, guess, low, high)
+
+    return par, effort
+
+
+def par_table(
+    method: int = DistanceMethod.ScopedPercentage.value, translation: str = DEFAULT_TRANSLATION
+) -> np.ndarray:
+    """Guesses needed for the verse at each position, under the given distance method."""
+    return solve(method, translation)[0]
+
+
+@lru_cache(maxsize=MAX_LOADED)
+def difficulty_table(translation: str = DEFAULT_TRANSLATION) -> np.ndarray:
+    """Difficulty of the verse at each position, by par summed over the methods.
+
+    Most verses share a par, so those are ordered by how many verses were still possible
+    before each guess. The cuts fall a third and two thirds of the way through that order,
+    and verses scoring the same as a cut go to the tier above it; tiers are only roughly
+    equal in size.
+    """
+    solved = [solve(method.value, translation) for method in DistanceMethod]
+    par = sum(par.astype(np.int64) for par, _ in solved)
+    effort = sum(effort for _, effort in solved)
+
+    # effort only breaks ties between equal pars, it never outweighs a whole guess
+    score = par + effort / (effort.max() + 1)
+    ordered = np.sort(score)
+    cuts = ordered[[len(ordered) // 3, len(ordered) * 2 // 3]]
+
+    tiers = np.array([Difficulty.Easy.value, Difficulty.Medium.value, Difficulty.Hard.value], dtype=np.int8)
+    return tiers[np.searchsorted(cuts, score, side="right")]
+
+
+@lru_cache(maxsize=64)
+def difficulty_positions(
+    categories: Tuple[int, ...], difficulty: int, translation: str = DEFAULT_TRANSLATION
+) -> np.ndarray:
+    """Positions of the verses in categories with the given difficulty, or all of them if none has it."""
+    cat = catalog(translation)
+    in_categories = np.zeros(len(cat.verse_ids), dtype=bool)
+    for category in categories:
+        for start, stop in cat.category_ranges.get(category, []):
+            in_categories[start:stop] = True
+
+    positions = np.flatnonzero(in_categories & (difficulty_table(translation) == difficulty))
+    return positions if len(positions) else np.flatnonzero(in_categories)
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="compute the par of every verse")
+    parser.add_argument("--method", choices=[method.name for method in DistanceMethod], default="ScopedPercentage")
+    parser.add_argument("--translation", default=DEFAULT_TRANSLATION)
+    args = parser.parse_args()
+
+    start = perf_counter()
+    table = par_table(DistanceMethod[args.method].value, args.translation)
+    elapsed = perf_counter() - start
+
+    values, counts = np.unique(table, return_counts=True)
+    for value, count in zip(values, counts):
+        print(f"par {value:>3}: {count:>6} verses")
+    print(f"mean {table.mean():.2f} over {len(table)} verses in {elapsed:.2f}s")
@@ -0,0 +1,112 @@
+from collections import OrderedDict, deque
+from os import environ
+from threading import Lock
+from typing import Deque, Dict, List, Tuple
+
+from configuration import DEFAULT_TRANSLATION, Difficulty
+from game import new_answer
+from verse import VerseWithText
+from workers import executor, run_blocking
+
+# ready-made answers kept per (categories, difficulty, translation), and how many of those sets to keep
+QUEUE_SIZE = int(environ.get("SWORDDRILL_PREFETCH", 8))
+MAX_QUEUES = 32
+
+QueueKey = Tuple[Tuple[int, ...], int, str]
+
+
+def queue_key(
+    categories: List[int], difficulty: int = Difficulty.Any.value, translation: str = DEFAULT_TRANSLATION
+) -> QueueKey:
+    return tuple(sorted(set(categories))), int(difficulty), translation
+
+
+class AnswerQueue:
+    def __init__(self, size: int = QUEUE_SIZE, max_queues: int = MAX_QUEUES):
+        self.size = size
+        self.max_queues = max_queues
+        self._queues: "OrderedDict[QueueKey, Deque[VerseWithText]]" = OrderedDict()
+        self._refilling = set()
+        self._lock = Lock()
+        self._stats = {"hits": 0, "misses": 0, "produced": 0}
+
+    def _pop(self, key: QueueKey):
+        with self._lock:
+            queue = self._queues.get(key)
+            if queue is None:
+                queue = self._queues[key] = deque()
+                if len(self._queues) > self.max_queues:
+                    self._queues.popitem(last=False)
+            self._queues.move_to_end(key)
+
+            if queue:
+                self._stats["hits"] += 1
+                return queue.popleft()
+
+            self._stats["misses"] += 1
+            return None
+
+    def prime(
+        self, categories: List[int], difficulty: int = Difficulty.Any.value, translation: str = DEFAULT_TRANSLATION
+    ):
+        key = queue_key(categories, difficulty, translation)
+
+        with self._lock:
+            if key not in self._queues:
+                self._queues[key] = deque()
+                if len(self._queues) > self.max_queues:
+                    self._queues.popitem(last=False)
+
+        self._schedule_refill(key)
+
+    def _schedule_refill(self, key: QueueKey):
+        with self._lock:
+            if key in self._refilling or self.size <= 0:
+                return
+            self._refilling.add(key)
+
+        executor.submit(self._refill, key)
+
+    def _refill(self, key: QueueKey):
+        categories, difficulty, translation = key
+        try:
+            while True:
+                with self._lock:
+                    queue = self._queues.get(key)
+                    # stop once full, or if the queue was evicted while we were filling it
+                    if queue is None or len(queue) >= self.size:
+                        return
+
+                answer = new_answer(list(categories), difficulty, translation)
+
+                with self._lock:
+                    queue.append(answer)
+                    self._stats["produced"] += 1
+        finally:
+            with self._lock:
+                self._refilling.discard(key)
+
+    async def take(
+        self, categories: List[int], difficulty: int = Difficulty.Any.value, translation: str = DEFAULT_TRANSLATION
+    ) -> VerseWithText:
+        key = queue_key(categories, difficulty, translation)
+        answer = self._pop(key)
+
+        if answer is None:
+            answer = await run_blocking(new_answer, list(key[0]), *key[1:])
+
+        self._schedule_refill(key)
+        return answer
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            requests = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": self._stats["hits"] / requests if requests else 0.0,
+                "queues": len(self._queues),
+                "queued": sum(len(queue) for queue in self._queues.values()),
+            }
+
+
+answers = AnswerQueue()
@@ -0,0 +1,149 @@
+import re
+from functools import lru_cache
+from typing import Dict, Optional, Set
+
+from catalog import catalog
+from configuration import DEFAULT_TRANSLATION
+from verse import Verse
+
+# common abbreviations that are not simply the start of a title; unambiguous prefixes ("gen", "1 cor") need none
+ABBREVIATIONS = {
+    "Genesis": ["gn"],
+    "Exodus": ["exo"],
+    "Leviticus": ["lv"],
+    "Numbers": ["nm", "nb"],
+    "Deuteronomy": ["dt"],
+    "Joshua": ["jsh"],
+    "Judges": ["jdg", "jgs", "jg"],
+    "Ruth": ["rth", "rt"],
+    "1 Samuel": ["1sm"],
+    "2 Samuel": ["2sm"],
+    "1 Kings": ["1kgs", "1kg"],
+    "2 Kings": ["2kgs", "2kg"],
+    "1 Chronicles": ["1chr"],
+    "2 Chronicles": ["2chr"],
+    "Esther": ["est"],
+    "Psalms": ["ps", "psa", "pss", "psalm"],
+    "Proverbs": ["prv"],
+    "Ecclesiastes": ["eccl", "qoh"],
+    "Song of Solomon": ["song", "sos", "ss", "sg", "canticles"],
+    "Ezekiel": ["ezk"],
+    "Joel": ["jl"],
+    "Obadiah": ["ob"],
+    "Jonah": ["jnh"],
+    "Nahum": ["nah"],
+    "Habakkuk": ["hab"],
+    "Zephaniah": ["zep", "zph"],
+    "Haggai": ["hg"],
+    "Zechariah": ["zec"],
+    "Matthew": ["mt"],
+    "Mark": ["mk", "mrk"],
+    "Luke": ["lk"],
+    "John": ["jn", "jhn"],
+    "Romans": ["rm"],
+    "Philippians": ["phil", "php"],
+    "1 Thessalonians": ["1th"],
+    "2 Thessalonians": ["2th"],
+    "Philemon": ["phlm", "phm"],
+    "James": ["jas", "jm"],
+    "1 Peter": ["1pt"],
+    "2 Peter": ["2pt"],
+    "1 John": ["1jn", "1jhn"],
+    "2 John": ["2jn", "2jhn"],
+    "3 John": ["3jn", "3jhn"],
+    "Jude": ["jude"],
+    "Revelation": ["rv", "apoc"],
+}
+
+ORDINALS = {
+    "iii": "3",
+    "ii": "2",
+    "i": "1",
+    "first": "1",
+    "second": "2",
+    "third": "3",
+    "1st": "1",
+    "2nd": "2",
+    "3rd": "3",
+}
+
+# book, then chapter, then an optional verse after a space, colon or dot
+REFERENCE = re.compile(
+    r"^\s*(?P<book>(?:[1-3]\s*)?[^\d]+?)\s*\.?\s*(?P<chapter>\d+)(?:\s*[\s:.]\s*(?P<verse>\d+))?\s*$"
+)
+
+
+def normalize(text: str) -> str:
+    words = text.lower().replace(".", " ").split()
+    if len(words) > 1 and words[0] in ORDINALS:
+        words[0] = ORDINALS[words[0]]
+    return "".join(words)
+
+
+class TrieNode:
+    __slots__ = ("children", "books", "book")
+
+    def __init__(self):
+        self.children: Dict[str, "TrieNode"] = {}
+        # every book whose title or abbreviation passes through this node
+        self.books: Set[str] = set()
+        # the book whose title or abbreviation ends exactly here
+        self.book: Optional[str] = None
+
+
+@lru_cache(maxsize=1)
+def book_trie() -> TrieNode:
+    root = TrieNode()
+    for book in catalog().books:
+        for name in [book, *ABBREVIATIONS.get(book, [])]:
+            node = root
+            for char in normalize(name):
+                node = node.children.setdefault(char, TrieNode())
+                node.books.add(book)
+            node.book = book
+
+    return root
+
+
+def find_book(text: str) -> Optional[str]:
+    """The book text names exactly or by abbreviation, or the only book starting with it."""
+    node = book_trie()
+    for char in normalize(text):
+        node = node.children.get(char)
+        if node is None:
+            return None
+
+    if node.book is not None:
+        return node.book
+    if len(node.books) == 1:
+        return next(iter(node.books))
+    return None
+
+
+def parse_reference(text: str, translation: str = DEFAULT_TRANSLATION) -> Verse:
+    """Parse references like "jn 3 16", "1 Cor 13:4" or "Ps119.105", raising ValueError when they don't exist."""
+    match = REFERENCE.match(text)
+    if match is None:
+        raise ValueError(f"Not a reference: {text}")
+
+    book = find_book(match.group("book"))
+    if book is None:
+        raise ValueError(f"Unknown book: {match.group('book').strip()}")
+
+    cat = catalog(translation)
+    chapter = int(match.group("chapter"))
+    verse = match.group("verse")
+
+    # "Jude 5" is a verse, there is only one chapter
+    if verse is None and cat.chapters[book] == [1]:
+        chapter, verse = 1, chapter
+    if verse is None:
+        raise ValueError(f"Missing verse: {text}")
+    verse = int(verse)
+
+    if chapter not in cat.chapters[book]:
+        raise ValueError(f"{book} has no chapter {chapter}")
+    if verse not in cat.verses[(book, chapter)]:
+        raise ValueError(f"{book} {chapter} has no verse {verse}")
+
+    return {"book": book, "chapter": chapter, "verse": verse}  # type: ignore
@@ -0,0 +1,134 @@
+"""Check, and optionally add, the indexes bible.db needs for its point lookups.
+
+    python schema.py [database]           report missing indexes and full scans, exit 1 if any
+    python schema.py --migrate [database] create the missing indexes, then check again
+
+Loading the catalog, verse index and texts reads every row on purpose, so only the
+point lookups below are expected to avoid full table scans. --migrate also builds
+the full-text index search.py uses.
+"""
+from sqlite3 import connect, Connection
+from sys import argv, exit
+from typing import List, Tuple
+
+from database import DATABASE
+from search import build_search_index, has_search_index
+from translations import verse_tables
+
+# (table, leading columns) of every index the lookups rely on
+REQUIRED_INDEXES: List[Tuple[str, Tuple[str, ...]]] = [
+    ("kjv", ("book", "chapter", "verse")),
+    ("book_info", ("title_short",)),
+    ("book_info", ("order",)),
+    ("key_english", ("b",)),
+]
+
+HOT_QUERIES: List[Tuple[str, str, tuple]] = [
+    (
+        "verse by id",
+        """
+        SELECT bi.title_short AS book, k.chapter, k.verse, k.text
+          FROM kjv AS k
+            LEFT JOIN book_info AS bi ON bi.`order` = k.book
+         WHERE k.id = ?;
+        """,
+        (1,),
+    ),
+    (
+        "id by reference",
+        """
+        SELECT k.id
+          FROM book_info AS bi
+            JOIN kjv AS k ON k.book = bi.`order`
+         WHERE bi.title_short = ?
+           AND k.chapter = ?
+           AND k.verse = ?;
+        """,
+        ("Genesis", 1, 1),
+    ),
+    (
+        "book category",
+        """
+        SELECT ke.g
+          FROM key_english AS ke
+         WHERE ke.b = ?;
+        """,
+        (1,),
+    ),
+]
+
+
+def index_name(table: str, columns: Tuple[str, ...]) -> str:
+    return f"idx_{table}_{'_'.join(columns)}"
+
+
+def has_index(conn: Connection, table: str, columns: Tuple[str, ...]) -> bool:
+    # an INTEGER PRIMARY KEY is the rowid and needs no separate index
+    if len(columns) == 1:
+        for _, name, column_type, _, _, pk in conn.execute(f"PRAGMA table_info(`{table}`);"):
+            if name == columns[0] and pk == 1 and column_type.upper() == "INTEGER":
+                return True
+
+    for index in conn.execute(f"PRAGMA index_list(`{table}`);"):
+        indexed = [info[2] for info in conn.execute(f"PRAGMA index_info(`{index[1]}`);")]
+        if tuple(indexed[: len(columns)]) == columns:
+            return True
+
+    return False
+
+
+def missing_indexes(conn: Connection) -> List[Tuple[str, Tuple[str, ...]]]:
+    return [(table, columns) for table, columns in REQUIRED_INDEXES if not has_index(conn, table, columns)]
+
+
+def full_scans(conn: Connection) -> List[Tuple[str, str]]:
+    scans = []
+    for name, query, parameters in HOT_QUERIES:
+        for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", parameters):
+            detail = row[-1]
+            if detail.startswith("SCAN"):
+                scans.append((name, detail))
+    return scans
+
+
+def migrate(conn: Connection):
+    for table, columns in missing_indexes(conn):
+        column_list = ", ".join(f"`{column}`" for column in columns)
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {index_name(table, columns)} ON `{table}` ({column_list});")
+    for translation in verse_tables(conn):
+        if not has_search_index(conn, translation):
+            build_search_index(conn, translation)
+    conn.execute("ANALYZE;")
+    conn.commit()
+
+
+def verify(conn: Connection) -> List[str]:
+    problems = [f"missing index on {table}({', '.join(columns)})" for table, columns in missing_indexes(conn)]
+    problems += [f"{name} does a full scan: {detail}" for name, detail in full_scans(conn)]
+    problems += [
+        f"missing full-text index for {translation}, the practice page needs it"
+        for translation in verse_tables(conn)
+        if not has_search_index(conn, translation)
+    ]
+    return problems
+
+
+def main(args: List[str]) -> int:
+    should_migrate = "--migrate" in args
+    paths = [arg for arg in args if not arg.startswith("--")]
+
+    # opened directly, the pooled connections are read-only
+    conn = connect(paths[0] if paths else DATABASE)
+    if should_migrate:
+        migrate(conn)
+
+    problems = verify(conn)
+    conn.close()
+
+    for problem in problems:
+        print(problem)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    exit(main(argv[1:]))
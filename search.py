@@ -0,0 +1,121 @@
+"""Full-text search over the verse text with an FTS5 index stored in bible.db.
+
+    python search.py --build [database]       create or rebuild the <translation>_fts index of every translation
+    python search.py "phrase" [translation]   print the best matching verses in BIBLE_DB
+"""
+from html import escape
+from sqlite3 import connect, Connection
+from sys import argv, exit
+from typing import List, NamedTuple
+
+from catalog import catalog
+from configuration import DEFAULT_TRANSLATION
+from database import DATABASE, get_connection
+from translations import verse_table, verse_tables
+
+MAX_RESULTS = 20
+
+# snippet markers that cannot occur in verse text, replaced after the text is escaped
+MARK_START, MARK_END = "\x02", "\x03"
+
+
+class SearchResult(NamedTuple):
+    id: int
+    book: str
+    chapter: int
+    verse: int
+    # verse text around the matches as html, matches in <b>
+    snippet: str
+
+
+def fts_table(translation: str) -> str:
+    return f"{translation}_fts"
+
+
+def has_search_index(conn: Connection, translation: str = DEFAULT_TRANSLATION) -> bool:
+    resp = conn.execute(
+        "SELECT count(*) AS n FROM sqlite_master WHERE type = 'table' AND name = ?;", (fts_table(translation),)
+    )
+    return resp.fetchone()[0] > 0
+
+
+def build_search_index(conn: Connection, translation: str = DEFAULT_TRANSLATION):
+    # external content table, the text itself stays in the translation's table only
+    table = fts_table(translation)
+    conn.execute(f"DROP TABLE IF EXISTS {table};")
+    conn.execute(
+        f"""
+        CREATE VIRTUAL TABLE {table} USING fts5(
+          text,
+          content = '{translation}',
+          content_rowid = 'id',
+          prefix = '2 3',
+          tokenize = 'unicode61 remove_diacritics 2'
+        );
+        """
+    )
+    conn.execute(f"INSERT INTO {table}({table}) VALUES ('rebuild');")
+    conn.execute(f"INSERT INTO {table}({table}) VALUES ('optimize');")
+    conn.commit()
+
+
+def match_expression(phrase: str) -> str:
+    # every word must appear, the last one may still be being typed; quoting keeps fts5 syntax out of user input
+    words = phrase.split()
+    terms = ['"' + word.replace('"', '""') + '"' for word in words]
+    if terms:
+        terms[-1] += "*"
+    return " ".join(terms)
+
+
+def search(phrase: str, limit: int = MAX_RESULTS, translation: str = DEFAULT_TRANSLATION) -> List[SearchResult]:
+    expression = match_expression(phrase)
+    if not expression:
+        return []
+
+    table = fts_table(verse_table(translation))
+    conn = get_connection()
+    resp = conn.execute(
+        f"""
+        SELECT f.rowid AS id, snippet({table}, 0, ?, ?, '…', 16) AS snippet
+          FROM {table} AS f
+         WHERE {table} MATCH ?
+         ORDER BY rank
+         LIMIT ?;
+        """,
+        (MARK_START, MARK_END, expression, limit),
+    )
+
+    references = catalog(translation).references
+    results = []
+    for row in resp:
+        book, chapter, verse = references[row.id]
+        snippet = escape(row.snippet).replace(MARK_START, "<b>").replace(MARK_END, "</b>")
+        results.append(SearchResult(row.id, book, chapter, verse, snippet))
+
+    return results
+
+
+def main(args: List[str]) -> int:
+    build = "--build" in args
+    args = [arg for arg in args if not arg.startswith("--")]
+
+    if build:
+        # opened directly, the pooled connections are read-only
+        conn = connect(args[0] if args else DATABASE)
+        for translation in verse_tables(conn):
+            build_search_index(conn, translation)
+        conn.close()
+        return 0
+
+    if not args:
+        print(__doc__)
+        return 1
+
+    for result in search(args[0], translation=args[1] if len(args) > 1 else DEFAULT_TRANSLATION):
+        print(f"{result.book} {result.chapter}:{result.verse}  {result.snippet}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main(argv[1:]))
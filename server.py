@@ -1,37 +1,56 @@
+from fastapi.responses import PlainTextResponse
+from functools import partial
 from nicegui import app, ui
+from nicegui.events import ValueChangeEventArguments
 from os import environ
-
-from configuration import DistanceMethod, SearchCategory
-from distance import (
-    percent_between,
-    row_ids,
-    distance_between_books,
-    distance_between_chapters,
-    distance_between_verses,
-)
+from sqlite3 import OperationalError
+from typing import List, Optional, Tuple
+
+from configuration import DEFAULT_TRANSLATION, ContextBoundary, Difficulty, DistanceMethod, SearchCategory
+import api  # registers the headless /api routes
+from daily import DAILY_CONTEXT_COUNT, daily_puzzle, today
+from database import close_connections, get_connection, pool_stats
+from distance import verse_id
+from game import migrate_state, score_guesses, scored_guesses
+from metrics import render, timed
+from prefetch import answers
+from references import parse_reference
+from search import SearchResult, search
+from schema import verify
 from lookups import (
-    get_connection,
-    random_verse_from_category,
-    context_verses,
+    context_window,
+    load_translation,
+    use_translation,
+    verse_by_id,
     books,
     chapters,
     verses,
 )
 from state import State, Guess, guess_done
+from storage import backend, load_state, save_state, state_update
+from translations import translations
 from verse import Verse
+from workers import run_blocking, shutdown
+
 
+DEFAULT_CATEGORIES = [1, 2, 3, 4, 5, 6, 7, 8, 9]
+DEFAULT_CONTEXT_COUNT = 1
+STATE_VERSION = 13
 
-def default_state() -> State:
-    conn = get_connection()
-    categories = [1, 2, 3, 4, 5, 6, 7, 8, 9]
-    answer = random_verse_from_category(conn, categories)
-    count = 1
+
+async def default_state(answer_id: Optional[int] = None) -> State:
+    categories = DEFAULT_CATEGORIES
+    count = DEFAULT_CONTEXT_COUNT
+    if answer_id is None:
+        answer_id = verse_id(await answers.take(categories))
     total_guesses = 7
     value = {
-        "version": 12,
-        "answer": answer,
-        "answer_pre_context": context_verses(conn, answer, count, False),
-        "answer_post_context": context_verses(conn, answer, count, True),
+        "version": STATE_VERSION,
+        "answer_id": answer_id,
+        "answer_context_count": count,
+        "answer_context_boundary": ContextBoundary.Bible.value,
+        "answer_translation": DEFAULT_TRANSLATION,
+        "daily": None,
         "guesses": [],
         "guesses_remaining": total_guesses,
         "current": {"book": "Genesis", "chapter": 1, "verse": 1},
@@ -40,39 +59,49 @@ def default_state() -> State:
         "chapter": {"max": 1, "enabled": True},
         "verse": {"max": 1, "enabled": True},
         "context_count": count,
+        "context_boundary": ContextBoundary.Bible.value,
         "total_guesses": total_guesses,
         "distance_method": DistanceMethod.ScopedPercentage.value,
-        "search_categories": categories,
+        "search_categories": list(categories),
+        "difficulty": Difficulty.Any.value,
+        "translation": DEFAULT_TRANSLATION,
     }
-    conn.close()
 
     return value  # type: ignore
 
 
-def reset():
-    app.storage.user["state"]["book"]["enabled"] = True
-    app.storage.user["state"]["chapter"]["enabled"] = True
-    app.storage.user["state"]["verse"]["enabled"] = True
-    app.storage.user["state"]["guess"]["enabled"] = True
-
-    app.storage.user["state"]["current"]["book"] = "Genesis"
-    app.storage.user["state"]["current"]["chapter"] = 1
-    app.storage.user["state"]["current"]["verse"] = 1
-
-    conn = get_connection()
-    answer = random_verse_from_category(conn, app.storage.user["state"]["search_categories"])
-    app.storage.user["state"]["answer"] = answer
-    app.storage.user["state"]["answer_pre_context"] = context_verses(
-        conn, answer, app.storage.user["state"]["context_count"], False
-    )
-    app.storage.user["state"]["answer_post_context"] = context_verses(
-        conn, answer, app.storage.user["state"]["context_count"], True
-    )
-    app.storage.user["state"]["guesses"] = []
-    app.storage.user["state"]["guesses_remaining"] = app.storage.user["state"]["total_guesses"]
-    conn.close()
+@timed("handler", "reset")
+async def reset(results: "ResultsList", form: "GuessForm", daily: bool = False):
+    translation = app.storage.user["state"]["translation"]
+    loaded = await use_translation(translation)
+    day = today() if daily else None
+    if day is not None:
+        answer, _, _ = daily_puzzle(day, translation)
+    else:
+        answer = await answers.take(
+            app.storage.user["state"]["search_categories"], app.storage.user["state"]["difficulty"], translation
+        )
 
-    results_ui.refresh()
+    with state_update() as state:
+        state["book"]["enabled"] = True
+        state["chapter"]["enabled"] = True
+        state["verse"]["enabled"] = True
+        state["guess"]["enabled"] = True
+
+        state["current"]["book"] = "Genesis"
+        state["current"]["chapter"] = 1
+        state["current"]["verse"] = 1
+
+        state["answer_id"] = verse_id(answer, translation, loaded.catalog)
+        state["answer_translation"] = translation
+        state["answer_context_count"] = DAILY_CONTEXT_COUNT if day is not None else state["context_count"]
+        state["answer_context_boundary"] = ContextBoundary.Bible.value if day is not None else state["context_boundary"]
+        state["daily"] = day
+        state["guesses"] = []
+        state["guesses_remaining"] = state["total_guesses"]
+
+    results.show([], app.storage.user["state"]["distance_method"])
+    await form.update_options(True)
     verse_ui.refresh()
 
 
@@ -113,42 +142,68 @@ distance_methods_to_str = {
 }
 
 
-@ui.refreshable
-def results_ui():
-    for index, guess in enumerate(reversed(app.storage.user["state"]["guesses"])):
-        book_string = guess["book"]
-        chapter_string = str(guess["chapter"])
-        verse_string = str(guess["verse"])
-        distance_string = ""
+def guess_html(guess: Guess, distance_method: int) -> str:
+    book_string = guess["book"]
+    chapter_string = str(guess["chapter"])
+    verse_string = str(guess["verse"])
+    distance_string = ""
+
+    if guess["book_found"]:
+        book_string = f"<b>{book_string}</b>"
 
-        if guess["book_found"]:
-            book_string = f"<b>{book_string}</b>"
+    if guess["chapter_found"]:
+        chapter_string = f"<b>{chapter_string}</b>"
 
-        if guess["chapter_found"]:
-            chapter_string = f"<b>{chapter_string}</b>"
+    if guess["verse_found"]:
+        verse_string = f"<b>{verse_string}</b>"
 
-        if guess["verse_found"]:
-            verse_string = f"<b>{verse_string}</b>"
+    if not guess_done(guess):
+        distance_string = distance_methods_to_str[distance_method](guess)
 
-        if not guess_done(guess):
-            distance_method = distance_methods_to_str[app.storage.user["state"]["distance_method"]]
-            distance_string = distance_method(guess)
+    return f"{book_string} {chapter_string}:{verse_string}{distance_string}"
 
-        card = ui.card().classes("w-full min-w-max")
-        with card:
-            if index == 0:
-                card.tailwind.background_color("neutral-200")
 
-            row = ui.row()
-            with row:
-                if index > 0:
-                    row.tailwind.text_color("neutral-500")
+class ResultsList(ui.column):
+    """Guess cards, newest first, updated in place instead of being rebuilt on every guess."""
 
-                ui.icon(guess["icon"]).classes("text-2xl")
-                ui.html(f"{book_string} {chapter_string}:{verse_string}{distance_string}")
+    def __init__(self):
+        super().__init__()
+        self.entries: List[Tuple[ui.html, Guess]] = []
+        self.latest: Optional[Tuple[ui.card, ui.row]] = None
 
+    def show(self, guesses: List[Guess], distance_method: int):
+        self.clear()
+        self.entries = []
+        self.latest = None
 
-def add_guess():
+        for guess in guesses:
+            self.add(guess, distance_method)
+
+    def add(self, guess: Guess, distance_method: int):
+        if self.latest is not None:
+            card, row = self.latest
+            card.classes(remove="bg-neutral-200")
+            row.classes("text-neutral-500")
+
+        with self:
+            card = ui.card().classes("w-full min-w-max bg-neutral-200")
+            with card:
+                row = ui.row()
+                with row:
+                    ui.icon(guess["icon"]).classes("text-2xl")
+                    html = ui.html(guess_html(guess, distance_method))
+        card.move(target_index=0)
+
+        self.entries.append((html, guess))
+        self.latest = (card, row)
+
+    def update_distances(self, distance_method: int):
+        for html, guess in self.entries:
+            html.content = guess_html(guess, distance_method)
+
+
+@timed("handler", "add_guess")
+async def add_guess(results: ResultsList):
     current = app.storage.user["state"]["current"]
 
     guess: Verse = {
@@ -157,165 +212,208 @@ def add_guess():
         "verse": current["verse"],
     }  # type: ignore
 
-    answer = app.storage.user["state"]["answer"]
-    conn = get_connection()
-    answer_id, guess_id = row_ids(conn, answer, guess)
-    text_percent, direction = percent_between(conn, answer_id, guess_id)
-
-    distance_away_books = distance_between_books(conn, answer_id, guess_id)
-    distance_away_chapters = distance_between_chapters(conn, answer_id, guess_id, answer["book"])
-    distance_away_verse = distance_between_verses(conn, answer_id, guess_id, answer["book"], answer["chapter"])
-    conn.close()
-
-    book_found = guess["book"] == answer["book"]
-    chapter_found = guess["chapter"] == answer["chapter"]
-    verse_found = guess["verse"] == answer["verse"]
-
-    new_guess: Guess = {
-        "book": guess["book"],
-        "chapter": guess["chapter"],
-        "verse": guess["verse"],
-        "icon": "arrow_back" if direction == "higher" else "arrow_forward",
-        "percent": text_percent,
-        "distance_away_books": distance_away_books,
-        "distance_away_chapters": distance_away_chapters,
-        "distance_away_verses": distance_away_verse,
-        "book_found": book_found,
-        "chapter_found": book_found and chapter_found,
-        "verse_found": book_found and chapter_found and verse_found,
-    }  # type: ignore
+    answer_id = app.storage.user["state"]["answer_id"]
+    translation = app.storage.user["state"]["answer_translation"]
+    loaded = await use_translation(translation)
+    answer = verse_by_id(answer_id, translation, loaded)
+    guess_id = verse_id(guess, translation, loaded.catalog)
+    new_guess = scored_guesses.score(answer_id, guess_id, translation, loaded)
 
     if guess_done(new_guess):
-        new_guess["icon"] = "emoji_events"
         ui.notify("You Win!", type="positive")
 
-    app.storage.user["state"]["guesses"].append(new_guess)
-    app.storage.user["state"]["guesses_remaining"] = app.storage.user["state"]["total_guesses"] - len(
-        app.storage.user["state"]["guesses"]
-    )
+    with state_update() as state:
+        state["guesses"].append(guess_id)
+        state["guesses_remaining"] = state["total_guesses"] - len(state["guesses"])
 
-    if len(app.storage.user["state"]["guesses"]) >= app.storage.user["state"]["total_guesses"]:
-        app.storage.user["state"]["guess"]["enabled"] = False
+        if len(state["guesses"]) >= state["total_guesses"]:
+            state["guess"]["enabled"] = False
 
-        if not guess_done(new_guess):
-            ui.notify(
-                f"Try Again! The correct verse is {answer['book']} {answer['chapter']}:{answer['verse']}",
-                type="warning",
-                position="bottom",
-            )
+            if not guess_done(new_guess):
+                ui.notify(
+                    f"Try Again! The correct verse is {answer['book']} {answer['chapter']}:{answer['verse']}",
+                    type="warning",
+                    position="bottom",
+                )
 
-    app.storage.user["state"]["book"]["enabled"] = not new_guess["book_found"]
-    app.storage.user["state"]["chapter"]["enabled"] = not new_guess["chapter_found"]
-    app.storage.user["state"]["verse"]["enabled"] = not new_guess["verse_found"]
+        state["book"]["enabled"] = not new_guess["book_found"]
+        state["chapter"]["enabled"] = not new_guess["chapter_found"]
+        state["verse"]["enabled"] = not new_guess["verse_found"]
 
-    results_ui.refresh()
+    results.add(new_guess, app.storage.user["state"]["distance_method"])
 
 
 @ui.refreshable
 def verse_ui():
+    answer_id = app.storage.user["state"]["answer_id"]
+    context_count = app.storage.user["state"]["answer_context_count"]
+    context_boundary = app.storage.user["state"]["answer_context_boundary"]
+    day = app.storage.user["state"]["daily"]
+    translation = app.storage.user["state"]["answer_translation"]
+
+    if day is not None:
+        _, pre_context, post_context = daily_puzzle(day, translation)
+    else:
+        pre_context, post_context = context_window(answer_id, context_count, context_boundary, translation)
+
     with ui.column():
-        for verse in app.storage.user["state"].get("answer_pre_context", []):
+        for verse in pre_context:
             ui.label(verse["text"])
 
-        ui.label(app.storage.user["state"]["answer"]["text"]).tailwind.text_color("neutral-100").font_weight(
+        ui.label(verse_by_id(answer_id, translation)["text"]).tailwind.text_color("neutral-100").font_weight(
             "bold"
         ).font_size("lg")
 
-        for verse in app.storage.user["state"].get("answer_post_context", []):
+        for verse in post_context:
             ui.label(verse["text"])
 
 
-def get_verse_max() -> int:
-    current = app.storage.user["state"]["current"]
-    verses_in_chapter = verses(current["book"], current["chapter"])
+def get_verse_max(current: Verse, translation: str) -> int:
+    verses_in_chapter = verses(current["book"], current["chapter"], translation)
     max_verse = max(verses_in_chapter) if verses_in_chapter else 100
     return max_verse
 
 
-def get_chapter_max() -> int:
-    current = app.storage.user["state"]["current"]
-    chapters_in_book = chapters(current["book"])
+def get_chapter_max(current: Verse, translation: str) -> int:
+    chapters_in_book = chapters(current["book"], translation)
     max_chapter = max(chapters_in_book) if chapters_in_book else 100
     return max_chapter
 
 
-def update_guess_form():
-    guess_form.refresh()
+class GuessForm:
+    """Book, chapter and verse selects; only the dependent option lists change when a select does."""
 
-    # check if we should update due to max values changing
-    max_chapter = get_chapter_max()
+    def __init__(self, results: ResultsList):
+        current = app.storage.user["state"]["current"]
+        translation = app.storage.user["state"]["answer_translation"]
 
-    if (
-        app.storage.user["state"]["current"]["chapter"] is None
-        or app.storage.user["state"]["current"]["chapter"] > max_chapter
-    ):
-        app.storage.user["state"]["current"]["chapter"] = max_chapter
-        guess_form.refresh()
+        self.book = ui.select(options=books(translation), with_input=True, value=current["book"]).classes("w-40")
+        self.chapter = ui.select(options=chapters(current["book"], translation), value=current["chapter"]).classes(
+            "w-16"
+        )
+        self.verse = ui.select(
+            options=verses(current["book"], current["chapter"], translation), value=current["verse"]
+        ).classes("w-16")
+        # or type the whole reference, "jn 3 16", and guess it with enter
+        self.reference = ui.input(placeholder="jn 3 16").classes("w-28")
 
-    max_verse = get_verse_max()
-    if (
-        app.storage.user["state"]["current"]["verse"] is None
-        or app.storage.user["state"]["current"]["verse"] > max_verse
-    ):
-        app.storage.user["state"]["current"]["verse"] = max_verse
+        # update style
+        ui.query(".q-field__input").style("color: #fff")
+        ui.query(".q-field__native").style("color: #fff")
 
+        self.book.bind_enabled_from(app.storage.user["state"]["book"], "enabled")
+        self.book.bind_value(app.storage.user["state"]["current"], "book")
 
-@ui.refreshable
-def guess_form():
-    current = app.storage.user["state"]["current"]
+        self.chapter.bind_enabled_from(app.storage.user["state"]["chapter"], "enabled")
+        self.chapter.bind_value(app.storage.user["state"]["current"], "chapter")
 
-    book = ui.select(options=books(), with_input=True, value=current["book"]).classes("w-40")
-    chapter = ui.select(options=chapters(current["book"]), value=current["chapter"]).classes("w-16")
-    verse = ui.select(options=verses(current["book"], current["chapter"]), value=current["verse"]).classes("w-16")
+        self.verse.bind_enabled_from(app.storage.user["state"]["verse"], "enabled")
+        self.verse.bind_value(app.storage.user["state"]["current"], "verse")
 
-    # update style
-    ui.query(".q-field__input").style("color: #fff")
-    ui.query(".q-field__native").style("color: #fff")
+        self.reference.bind_enabled_from(app.storage.user["state"]["guess"], "enabled")
 
-    book.bind_enabled_from(app.storage.user["state"]["book"], "enabled")
-    book.bind_value(app.storage.user["state"]["current"], "book")
+        # setup updates, a verse change never affects the other selects so it is only saved
+        self.book.on(
+            "update:model-value",
+            handler=partial(self.update_options, True),
+        )
+        self.chapter.on(
+            "update:model-value",
+            handler=partial(self.update_options, False),
+        )
+        self.verse.on(
+            "update:model-value",
+            handler=save_state,
+        )
+        self.reference.on(
+            "keydown.enter",
+            handler=partial(self.guess_reference, results),
+        )
 
-    chapter.bind_enabled_from(app.storage.user["state"]["chapter"], "enabled")
-    chapter.bind_value(app.storage.user["state"]["current"], "chapter")
+        with ui.button("Guess", on_click=partial(add_guess, results)).bind_enabled_from(
+            app.storage.user["state"]["guess"], "enabled"
+        ):
+            ui.badge(color="red").props("floating").bind_text_from(app.storage.user["state"], "guesses_remaining")
 
-    verse.bind_enabled_from(app.storage.user["state"]["verse"], "enabled")
-    verse.bind_value(app.storage.user["state"]["current"], "verse")
+        with ui.button(icon="replay", on_click=partial(reset, results, self)):
+            ui.tooltip("Select a New Verse")
 
-    # setup updates
-    book.on(
-        "update:model-value",
-        handler=update_guess_form,
-    )
-    chapter.on(
-        "update:model-value",
-        handler=update_guess_form,
-    )
-    verse.on(
-        "update:model-value",
-        handler=update_guess_form,
-    )
+        with ui.button(icon="today", on_click=partial(reset, results, self, True)):
+            ui.tooltip("Play the Daily Verse")
+
+    @timed("handler", "guess_reference")
+    async def guess_reference(self, results: ResultsList):
+        translation = app.storage.user["state"]["answer_translation"]
+        await use_translation(translation)
+        try:
+            guess = parse_reference(self.reference.value or "", translation)
+        except ValueError as e:
+            ui.notify(str(e), type="warning")
+            return
+
+        state = app.storage.user["state"]
+        if not state["guess"]["enabled"]:
+            return
+
+        # parts already found stay locked, as they are in the selects
+        for key in ("book", "chapter", "verse"):
+            if not state[key]["enabled"] and guess[key] != state["current"][key]:
+                ui.notify(f"The {key} is already found", type="warning")
+                return
+
+        with state_update() as state:
+            state["current"].update(guess)
+
+        await self.update_options(True)
+        self.reference.value = ""
+        await add_guess(results)
+
+    @timed("handler", "update_guess_form")
+    async def update_options(self, book_changed: bool):
+        await use_translation(app.storage.user["state"]["answer_translation"])
+
+        # check if we should update due to max values changing, and save even if not: the select binding
+        # already wrote the new book or chapter to the stored state, so it isn't a change here
+        with state_update(force=True) as state:
+            current = state["current"]
+            translation = state["answer_translation"]
+
+            max_chapter = get_chapter_max(current, translation)
+            if current["chapter"] is None or current["chapter"] > max_chapter:
+                current["chapter"] = max_chapter
+
+            max_verse = get_verse_max(current, translation)
+            if current["verse"] is None or current["verse"] > max_verse:
+                current["verse"] = max_verse
 
-    with ui.button("Guess", on_click=add_guess).bind_enabled_from(app.storage.user["state"]["guess"], "enabled"):
-        ui.badge(color="red").props("floating").bind_text_from(app.storage.user["state"], "guesses_remaining")
+        # options first, so the new values are always among them
+        if book_changed:
+            self.chapter.options = chapters(current["book"], translation)
+            self.chapter.value = current["chapter"]
+            self.chapter.update()
 
-    with ui.button(icon="replay", on_click=reset):
-        ui.tooltip("Select a New Verse")
+        self.verse.options = verses(current["book"], current["chapter"], translation)
+        self.verse.value = current["verse"]
+        self.verse.update()
 
 
-def distance_method_on_change():
-    results_ui.refresh()
+def distance_method_on_change(results: ResultsList, event: ValueChangeEventArguments):
+    results.update_distances(DistanceMethod[event.value].value)
+    save_state()
 
 
 def categories_select_all():
-    app.storage.user["state"]["search_categories"] = [c.value for c in SearchCategory]
+    with state_update() as state:
+        state["search_categories"] = [c.value for c in SearchCategory]
 
 
 def categories_clear():
-    app.storage.user["state"]["search_categories"] = []
+    with state_update() as state:
+        state["search_categories"] = []
 
 
 @ui.refreshable
-def config_ui():
+def config_ui(results: ResultsList):
     with ui.expansion("General").classes("w-full"):
         ui.number(
             "Context Verses (+/-)",
@@ -324,17 +422,38 @@ def config_ui():
             step=1,
             format="%.0f",
             value=app.storage.user["state"]["context_count"],
+            on_change=save_state,
         ).classes("w-full").bind_value(
             app.storage.user["state"],
             "context_count",
         )
 
+        ui.select(
+            {option.value: option.name for option in ContextBoundary},
+            label="Context Boundary",
+            on_change=save_state,
+        ).classes("w-full").bind_value(
+            app.storage.user["state"],
+            "context_boundary",
+        )
+
+        # takes effect with the next verse, the current one stays in its translation
+        ui.select(
+            translations(),
+            label="Translation",
+            on_change=save_state,
+        ).classes("w-full").bind_value(
+            app.storage.user["state"],
+            "translation",
+        )
+
         ui.number(
             "Total Guesses",
             min=1,
             step=1,
             format="%.0f",
             value=app.storage.user["state"]["total_guesses"],
+            on_change=save_state,
         ).classes("w-full").bind_value(
             app.storage.user["state"],
             "total_guesses",
@@ -348,13 +467,26 @@ def config_ui():
         ui.select(
             {option.value: option.name for option in SearchCategory},
             multiple=True,
+            on_change=save_state,
         ).props("use-chips").bind_value(
             app.storage.user["state"],
             "search_categories",
         )
 
+    with ui.expansion("Difficulty", icon="speed").classes("w-full"):
+        # the easiest, middle or hardest third of the verses by par
+        ui.select(
+            {option.value: option.name for option in Difficulty},
+            on_change=save_state,
+        ).classes("w-full").bind_value(
+            app.storage.user["state"],
+            "difficulty",
+        )
+
     with ui.expansion("Distance Method", icon="query_stats").classes("w-full"):
-        ui.select([option.name for option in DistanceMethod], on_change=distance_method_on_change).bind_value(
+        ui.select(
+            [option.name for option in DistanceMethod], on_change=partial(distance_method_on_change, results)
+        ).bind_value(
             app.storage.user["state"],
             "distance_method",
             forward=lambda name: DistanceMethod[name].value,
@@ -363,20 +495,35 @@ def config_ui():
 
 
 @ui.page("/game", title="Sword Drill Game")
-def game_page():
-    # load the state from storaged
-    defaults = dict(default_state())
+@timed("handler", "game_page")
+async def game_page():
+    # carry older stored state forward to the current format where possible
+    try:
+        if "state" in app.storage.user:
+            app.storage.user["state"] = migrate_state(dict(app.storage.user["state"]))
+    except Exception as e:
+        print(e)
 
-    # reset the user storage if the version is updated
-    if app.storage.user.get("state", {}).get("version", 0) != defaults["version"]:
-        app.storage.user["state"] = defaults
+    # another worker may have served this user last, the shared backend has their latest state
+    try:
+        shared = load_state()
+        if shared is not None:
+            app.storage.user["state"] = migrate_state(shared)
+    except Exception as e:
+        print(e)
+
+    # reset the user storage if the version is updated, or its translation is no longer in bible.db
+    stored = app.storage.user.get("state", {})
+    if stored.get("version", 0) != STATE_VERSION or any(
+        stored.get(key, DEFAULT_TRANSLATION) not in translations() for key in ("translation", "answer_translation")
+    ):
+        stored = {}
+
+    # load the state from storage, returning players keep their answer so only new ones take one from the queue
+    defaults = dict(await default_state(stored.get("answer_id")))
 
     try:
-        state = app.storage.user.get(
-            "state",
-            defaults,
-        )
-        defaults.update(state)
+        defaults.update(stored)
 
         app.storage.user["state"] = defaults
 
@@ -384,6 +531,22 @@ def game_page():
         print(e)
         app.storage.user["state"] = defaults
 
+    save_state()
+
+    loaded = await use_translation(app.storage.user["state"]["answer_translation"])
+
+    # the header and drawer are page layout slots, so the results can be created first
+    results = ResultsList()
+    results.show(
+        score_guesses(
+            app.storage.user["state"]["answer_id"],
+            app.storage.user["state"]["guesses"],
+            app.storage.user["state"]["answer_translation"],
+            loaded,
+        ),
+        app.storage.user["state"]["distance_method"],
+    )
+
     with ui.header(elevated=True, fixed=True):
         with ui.column():
             with ui.row():
@@ -393,24 +556,19 @@ def game_page():
             verse_ui()
 
             with ui.row():
-                guess_form()
+                GuessForm(results)
 
     with ui.right_drawer(fixed=False).style("background-color: #5898d4") as right_drawer:
         right_drawer.tailwind.text_color("white")
         with ui.column():
             ui.label("Configuration").tailwind.font_size("2xl").font_weight("bold")
-            config_ui()
-
-    with ui.column():
-        results_ui()
+            config_ui(results)
 
 
 @ui.page("/random-verse", title="Sword Drill Random Verse")
-def random_verse_page():
-    conn = get_connection()
-    categories = [1, 2, 3, 4, 5, 6, 7, 8, 9]
-    verse = random_verse_from_category(conn, categories)
-    conn.close()
+@timed("handler", "random_verse_page")
+async def random_verse_page():
+    verse = await answers.take(DEFAULT_CATEGORIES)
 
     dark = ui.dark_mode()
 
@@ -421,13 +579,97 @@ def random_verse_page():
         )
 
 
+@ui.page("/practice", title="Sword Drill Practice")
+@timed("handler", "practice_page")
+async def practice_page():
+    translation = app.storage.user.get("state", {}).get("translation", DEFAULT_TRANSLATION)
+
+    @ui.refreshable
+    def matches_ui(matches: Optional[List[SearchResult]]):
+        if matches is None:
+            ui.label("Search needs the full-text index, run `python search.py --build`")
+            return
+
+        for match in matches:
+            with ui.card().classes("w-full"):
+                ui.label(f"{match.book} {match.chapter}:{match.verse}").tailwind.font_weight("bold")
+                ui.html(match.snippet)
+
+    @timed("handler", "practice_search")
+    async def search_on_change(event: ValueChangeEventArguments):
+        try:
+            matches = await run_blocking(search, event.value or "", translation=translation)
+        except OperationalError:
+            matches = None
+        matches_ui.refresh(matches)
+
+    with ui.column().classes("w-full max-w-2xl mx-auto"):
+        ui.label("Find the Reference").tailwind.font_size("2xl").font_weight("extrabold")
+        ui.input("Phrase", on_change=search_on_change).props("autofocus debounce=200").classes("w-full")
+        matches_ui([])
+
+
+@app.get("/stats/database")
+def database_stats():
+    return pool_stats()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    stats = pool_stats()
+    prefetch = answers.stats()
+    guesses = scored_guesses.stats()
+    return render(
+        {
+            "db_connections_opened_total": stats["opened"],
+            "db_connections_closed_total": stats["closed"],
+            "db_connection_checkouts_total": stats["checkouts"],
+            "prefetch_hits_total": prefetch["hits"],
+            "prefetch_misses_total": prefetch["misses"],
+            "guess_cache_hits_total": guesses["hits"],
+            "guess_cache_misses_total": guesses["misses"],
+            "guess_cache_evictions_total": guesses["evictions"],
+        },
+        {"db_connections": stats["size"], "guess_cache_size": guesses["size"]},
+    )
+
+
+@app.get("/stats/prefetch")
+def prefetch_stats():
+    return answers.stats()
+
+
+@app.get("/stats/guesses")
+def guess_cache_stats():
+    return scored_guesses.stats()
+
+
+def check_schema():
+    # the pooled connections are read-only, run `python schema.py --migrate` to fix these
+    for problem in verify(get_connection()):
+        print(f"bible.db: {problem}")
+
+
+def load_corpus():
+    load_translation()
+    answers.prime(DEFAULT_CATEGORIES)
+
+
 def main():
+    app.on_startup(check_schema)
+    app.on_startup(load_corpus)
+    app.on_shutdown(shutdown)
+    app.on_shutdown(close_connections)
+    app.on_shutdown(backend.close)
     ui.link("Game", game_page)
     ui.link("Random Verse", random_verse_page)
+    ui.link("Practice", practice_page)
     ui.run(
         title="Sword Drill",
         favicon="🗡",
         storage_secret=environ.get("STORAGE_SECRET", "private key to secure the browser session cookie"),
+        port=int(environ.get("PORT", 8080)),
+        reload=environ.get("RELOAD", "true") == "true",
     )
 
 
@@ -20,5 +20,24 @@ fi
 # Install the requirements Only Needed when Requirements Change
 #$VIRTUALENV/bin/pip install -r requirements.txt
 
-# For development use (simple logging, etc):
-$VIRTUALENV/bin/python3 server.py
+# Number of server processes, each listening on its own port from BASE_PORT up.
+# With more than one, put a proxy with sticky sessions in front of them (see README)
+# and game state is shared through a sqlite database instead of per-process user storage.
+WORKERS=${WORKERS:-1}
+BASE_PORT=${BASE_PORT:-8080}
+
+if [ "$WORKERS" -le 1 ]; then
+  # For development use (simple logging, etc):
+  $VIRTUALENV/bin/python3 server.py
+  exit
+fi
+
+export SWORDDRILL_STATE_DB=${SWORDDRILL_STATE_DB:-.data/state.db}
+export RELOAD=false
+
+for i in $(seq 0 $((WORKERS - 1))); do
+  PORT=$((BASE_PORT + i)) $VIRTUALENV/bin/python3 server.py &
+done
+
+trap 'kill $(jobs -p)' EXIT
+wait
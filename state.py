@@ -1,5 +1,5 @@
-from verse import Verse, VerseWithText
-from typing import List
+from verse import Verse
+from typing import List, Optional
 from sys import version_info
 
 if version_info >= (3, 8):
@@ -39,17 +39,26 @@ class ControlNumber(ControlState):
 
 class State(TypedDict):  # type: ignore
     version: int
-    answer: VerseWithText
-    answer_pre_context: List[VerseWithText]
-    answer_post_context: List[VerseWithText]
-    guesses: List[Guess]
+    # id of the answer in answer_translation, text and context are looked up when rendering
+    answer_id: int
+    answer_context_count: int
+    answer_context_boundary: int
+    answer_translation: str
+    # ISO date of the daily puzzle being played, None for a random verse
+    daily: Optional[str]
+    # id of each guess, scored again when rendering
+    guesses: List[int]
     current: Verse
     guess: ControlState
     book: ControlState
     chapter: ControlNumber
     verse: ControlNumber
     context_count: int
+    context_boundary: int
     total_guesses: int
     guesses_remaining: int
     distance_method: int
     search_categories: List[int]
+    difficulty: int
+    # used from the next answer on
+    translation: str
@@ -0,0 +1,133 @@
+import json
+from contextlib import contextmanager
+from os import environ
+from sqlite3 import connect
+from threading import Lock
+from time import time
+from typing import Iterator, Optional
+
+from nicegui import app
+
+from state import State
+
+
+# set to share game state between server processes through one local sqlite database
+STATE_DATABASE = environ.get("SWORDDRILL_STATE_DB")
+
+
+class StateBackend:
+    """Where game state lives besides the per-process user storage; the default keeps nothing extra."""
+
+    def load(self, user_id: str) -> Optional[dict]:
+        return None
+
+    def save(self, user_id: str, state: dict):
+        pass
+
+    def close(self):
+        pass
+
+
+class SqliteStateBackend(StateBackend):
+    def __init__(self, filename: str):
+        self._lock = Lock()
+        self._conn = connect(filename, check_same_thread=False, isolation_level=None)
+        # WAL lets every worker read while one of them writes
+        self._conn.execute("PRAGMA journal_mode = WAL;")
+        self._conn.execute("PRAGMA synchronous = NORMAL;")
+        self._conn.execute("PRAGMA busy_timeout = 5000;")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS user_state (
+              user_id TEXT PRIMARY KEY,
+              state TEXT NOT NULL,
+              updated REAL NOT NULL
+            );
+            """
+        )
+
+    def load(self, user_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                """
+                SELECT us.state
+                  FROM user_state AS us
+                 WHERE us.user_id = ?;
+                """,
+                (user_id,),
+            ).fetchone()
+
+        return json.loads(row[0]) if row else None
+
+    def save(self, user_id: str, state: dict):
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO user_state (user_id, state, updated)
+                VALUES (?, ?, ?)
+                ON CONFLICT (user_id) DO UPDATE SET state = excluded.state, updated = excluded.updated;
+                """,
+                (user_id, json.dumps(state), time()),
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+backend: StateBackend = SqliteStateBackend(STATE_DATABASE) if STATE_DATABASE else StateBackend()
+
+
+def user_id() -> str:
+    # the signed browser id cookie is the same whichever worker serves the request
+    return app.storage.browser["id"]
+
+
+def load_state() -> Optional[dict]:
+    return backend.load(user_id())
+
+
+def save_state():
+    backend.save(user_id(), _plain(app.storage.user["state"]))
+
+
+def _plain(value):
+    if isinstance(value, dict):
+        return {key: _plain(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_plain(item) for item in value]
+    return value
+
+
+def _merge(stored: dict, updated: dict) -> bool:
+    # write through dict methods directly so the observable storage does not persist once per field
+    changed = False
+
+    for key in list(stored.keys()):
+        if key not in updated:
+            dict.__delitem__(stored, key)
+            changed = True
+
+    for key, value in updated.items():
+        current = stored.get(key)
+        if isinstance(current, dict) and isinstance(value, dict):
+            changed = _merge(current, value) or changed
+        elif key not in stored or current != value:
+            dict.__setitem__(stored, key, value)
+            changed = True
+
+    return changed
+
+
+@contextmanager
+def state_update(force: bool = False) -> Iterator[State]:
+    """Apply a group of mutations to the stored game state, then persist it once, or even unchanged with force."""
+    stored = app.storage.user["state"]
+    updated = _plain(stored)
+
+    yield updated  # type: ignore
+
+    # bindings poll the stored dicts, so they pick up the new values without a notification per field
+    if _merge(stored, updated) or force:
+        app.storage.user.backup()
+        backend.save(user_id(), updated)
@@ -0,0 +1,114 @@
+"""Build a bible.db with the same schema as the real one, filled with generated text.
+
+    python synthetic.py [output] [--scale 1.0] [--seed 0]
+
+Books, chapter counts and categories follow the KJV; --scale multiplies the number of
+verses per chapter (1.0 gives roughly the 31k verses of the real database).
+"""
+from argparse import ArgumentParser
+from os import path, remove
+from random import Random
+from sqlite3 import connect
+
+# (title_short, chapters, key_english.g)
+BOOKS = [
+    ("Genesis", 50, 1), ("Exodus", 40, 1), ("Leviticus", 27, 1), ("Numbers", 36, 1), ("Deuteronomy", 34, 1),
+    ("Joshua", 24, 2), ("Judges", 21, 2), ("Ruth", 4, 2), ("1 Samuel", 31, 2), ("2 Samuel", 24, 2),
+    ("1 Kings", 22, 2), ("2 Kings", 25, 2), ("1 Chronicles", 29, 2), ("2 Chronicles", 36, 2), ("Ezra", 10, 2),
+    ("Nehemiah", 13, 2), ("Esther", 10, 2), ("Job", 42, 3), ("Psalms", 150, 3), ("Proverbs", 31, 3),
+    ("Ecclesiastes", 12, 3), ("Song of Solomon", 8, 3), ("Isaiah", 66, 4), ("Jeremiah", 52, 4),
+    ("Lamentations", 5, 4), ("Ezekiel", 48, 4), ("Daniel", 12, 4), ("Hosea", 14, 4), ("Joel", 3, 4),
+    ("Amos", 9, 4), ("Obadiah", 1, 4), ("Jonah", 4, 4), ("Micah", 7, 4), ("Nahum", 3, 4), ("Habakkuk", 3, 4),
+    ("Zephaniah", 3, 4), ("Haggai", 2, 4), ("Zechariah", 14, 4), ("Malachi", 4, 4), ("Matthew", 28, 5),
+    ("Mark", 16, 5), ("Luke", 24, 5), ("John", 21, 5), ("Acts", 28, 6), ("Romans", 16, 7),
+    ("1 Corinthians", 16, 7), ("2 Corinthians", 13, 7), ("Galatians", 6, 7), ("Ephesians", 6, 7),
+    ("Philippians", 4, 7), ("Colossians", 4, 7), ("1 Thessalonians", 5, 7), ("2 Thessalonians", 3, 7),
+    ("1 Timothy", 6, 7), ("2 Timothy", 4, 7), ("Titus", 3, 7), ("Philemon", 1, 7), ("Hebrews", 13, 7),
+    ("James", 5, 7), ("1 Peter", 5, 7), ("2 Peter", 3, 7), ("1 John", 5, 7), ("2 John", 1, 7),
+    ("3 John", 1, 7), ("Jude", 1, 7), ("Revelation", 22, 8),
+]  # fmt: skip
+
+WORDS = (
+    "and the of that to in he shall unto for i his a lord they be is him not them it with all thou thy was god "
+    "which my me said but ye their have will thee from as are when this out were upon man by you israel king son "
+    "up there hath then people came had house into on her come one we children s before your also day land men"
+).split()
+
+
+def create_verse_table(conn, table: str = "kjv"):
+    conn.execute(
+        f"""
+        CREATE TABLE `{table}` (
+          id INTEGER PRIMARY KEY,
+          book INTEGER NOT NULL,
+          chapter INTEGER NOT NULL,
+          verse INTEGER NOT NULL,
+          text TEXT NOT NULL,
+          len INTEGER NOT NULL
+        );
+        """
+    )
+
+
+def create_schema(conn):
+    create_verse_table(conn)
+    conn.executescript(
+        """
+        CREATE TABLE book_info (
+          `order` INTEGER PRIMARY KEY,
+          title_short TEXT NOT NULL,
+          title_full TEXT NOT NULL,
+          abbreviation TEXT NOT NULL,
+          category TEXT NOT NULL,
+          otnt TEXT NOT NULL,
+          chapters INTEGER NOT NULL
+        );
+        CREATE TABLE key_english (
+          b INTEGER PRIMARY KEY,
+          n TEXT NOT NULL,
+          t TEXT NOT NULL,
+          g INTEGER NOT NULL
+        );
+        """
+    )
+
+
+def generate(filename: str, scale: float = 1.0, seed: int = 0):
+    if path.exists(filename):
+        remove(filename)
+
+    random = Random(seed)
+    conn = connect(filename)
+    create_schema(conn)
+
+    verse_rows = []
+    for order, (title, chapters, category) in enumerate(BOOKS, start=1):
+        testament = "OT" if order <= 39 else "NT"
+        conn.execute(
+            "INSERT INTO book_info VALUES (?, ?, ?, ?, ?, ?, ?);",
+            (order, title, f"The Book of {title}", title[:3], str(category), testament, chapters),
+        )
+        conn.execute("INSERT INTO key_english VALUES (?, ?, ?, ?);", (order, title, testament, category))
+
+        for chapter in range(1, chapters + 1):
+            for verse in range(1, max(1, round(random.randint(10, 42) * scale)) + 1):
+                text = " ".join(random.choice(WORDS) for _ in range(random.randint(6, 40))).capitalize() + "."
+                verse_rows.append((order * 1000000 + chapter * 1000 + verse, order, chapter, verse, text, len(text)))
+
+    # ids count up from 1 in reading order, like the real table
+    conn.executemany(
+        "INSERT INTO kjv VALUES (?, ?, ?, ?, ?, ?);",
+        ((i, *row[1:]) for i, row in enumerate(sorted(verse_rows), start=1)),
+    )
+    conn.commit()
+    conn.close()
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="generate a synthetic bible.db")
+    parser.add_argument("output", nargs="?", default="synthetic.db")
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    generate(args.output, args.scale, args.seed)
@@ -0,0 +1,19 @@
+"""Point every module at a migrated synthetic bible.db before any of them is imported."""
+from os import environ, path
+from sqlite3 import connect
+from tempfile import mkdtemp
+
+DIRECTORY = mkdtemp(prefix="sworddrill-tests-")
+DATABASE = path.join(DIRECTORY, "synthetic.db")
+
+environ["BIBLE_DB"] = DATABASE
+environ["BIBLE_CORPUS"] = path.join(DIRECTORY, "synthetic.corpus")
+environ["SWORDDRILL_METRICS"] = "0"
+
+from schema import migrate  # noqa: E402
+from synthetic import generate  # noqa: E402
+
+generate(DATABASE)
+conn = connect(DATABASE)
+migrate(conn)
+conn.close()
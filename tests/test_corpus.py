@@ -0,0 +1,75 @@
+from os import path, remove
+
+import pytest
+
+import database
+from catalog import catalog, catalog_from_corpus, catalog_from_database
+from corpus import Corpus, VerseIds, corpus_path, export_corpus, open_corpus
+
+
+@pytest.fixture(scope="module")
+def corpus(tmp_path_factory):
+    filename = path.join(tmp_path_factory.mktemp("corpus"), "synthetic.corpus")
+    export_corpus(filename)
+    return Corpus(filename)
+
+
+def test_mapped_catalog_matches_the_database(corpus):
+    assert corpus.ordered
+    mapped = catalog_from_corpus(corpus)
+    built = catalog_from_database()
+
+    assert mapped.books == built.books
+    assert mapped.book_orders == built.book_orders
+    assert mapped.book_titles == built.book_titles
+    assert mapped.chapter_counts == built.chapter_counts
+    assert mapped.chapters == built.chapters
+    assert mapped.category_ranges == built.category_ranges
+    assert list(mapped.verse_ids) == list(built.verse_ids)
+
+    assert set(mapped.verses) == set(built.verses)
+    for key, verses in built.verses.items():
+        assert mapped.verses[key] == verses
+    for reference, verse_id in built.ids.items():
+        assert mapped.ids[reference] == verse_id
+        assert mapped.references[verse_id] == reference
+
+
+def test_mapped_catalog_misses_like_a_dict(corpus):
+    mapped = catalog_from_corpus(corpus)
+    book = mapped.books[0]
+    last = mapped.verses[(book, 1)][-1]
+
+    assert mapped.verses.get((book, 10**6), []) == []
+    assert (book, 1, last + 1) not in mapped.ids
+    with pytest.raises(KeyError):
+        mapped.ids[(book, 1, last + 1)]
+    with pytest.raises(KeyError):
+        mapped.references[max(mapped.verse_ids) + 1]
+
+
+@pytest.fixture
+def exported():
+    # the corpus every module looks for, removed again so the other tests read sqlite
+    filename = corpus_path()
+    export_corpus(filename)
+    open_corpus.cache_clear()
+    catalog.cache_clear()
+    yield filename
+    remove(filename)
+    open_corpus.cache_clear()
+    catalog.cache_clear()
+
+
+def test_current_corpus_is_used(exported):
+    assert open_corpus() is not None
+    assert isinstance(catalog().ids, VerseIds)
+
+
+def test_stale_corpus_falls_back_to_sqlite(exported, monkeypatch, capsys):
+    # as after importer.py stamped bible.db with a new user_version
+    monkeypatch.setattr(database, "database_version", lambda: Corpus(exported).database_version + 1)
+
+    assert open_corpus() is None
+    assert "out of date" in capsys.readouterr().out
+    assert catalog() == catalog_from_database()
@@ -0,0 +1,78 @@
+from random import Random
+from sqlite3 import connect
+
+import pytest
+
+from catalog import catalog
+from configuration import DEFAULT_TRANSLATION
+from database import DATABASE
+from distance import distance_between_books, distance_between_chapters, distance_between_verses, percent_between
+
+# the queries distance.py ran per guess before the verse index replaced them
+BOOKS_BETWEEN = "SELECT count(*) FROM (SELECT DISTINCT k.book FROM kjv AS k WHERE id >= ? AND id < ?);"
+CHAPTERS_BETWEEN = "SELECT count(*) FROM (SELECT DISTINCT k.book, k.chapter FROM kjv AS k WHERE id >= ? AND id < ?);"
+VERSES_BETWEEN = (
+    "SELECT count(*) FROM (SELECT DISTINCT k.book, k.chapter, k.verse FROM kjv AS k WHERE id >= ? AND id < ?);"
+)
+LEN_BETWEEN = "SELECT sum(len) FROM kjv WHERE id > ? AND id < ?;"
+TOTAL_LEN = "SELECT sum(k.len) FROM kjv AS k;"
+TOTAL_BOOKS = "SELECT count(*) FROM book_info AS bi;"
+TOTAL_CHAPTERS = "SELECT bi.chapters FROM book_info AS bi WHERE bi.title_short = ?;"
+TOTAL_VERSES = """
+    SELECT max(k.verse)
+      FROM kjv AS k
+        LEFT JOIN book_info AS bi ON bi.`order` = k.book
+     WHERE bi.title_short = ?
+       AND k.chapter = ?;
+"""
+
+
+def pairs():
+    verse_ids = catalog(DEFAULT_TRANSLATION).verse_ids
+    rng = Random(0)
+    neighbours = [(verse_ids[i], verse_ids[i + 1]) for i in rng.sample(range(len(verse_ids) - 1), 5)]
+    far = [tuple(rng.sample(verse_ids, 2)) for _ in range(20)]
+    return [(verse_ids[0], verse_ids[0]), (verse_ids[0], verse_ids[-1])] + neighbours + far
+
+
+def scalar(conn, query, parameters=()):
+    return conn.execute(query, parameters).fetchone()[0] or 0
+
+
+@pytest.fixture(scope="module")
+def conn():
+    conn = connect(DATABASE)
+    yield conn
+    conn.close()
+
+
+@pytest.mark.parametrize("answer_id, guess_id", pairs())
+def test_verse_index_matches_the_original_queries(conn, answer_id, guess_id):
+    book, chapter, _ = catalog(DEFAULT_TRANSLATION).references[answer_id]
+    low, high = min(answer_id, guess_id), max(answer_id, guess_id)
+    same = answer_id == guess_id
+
+    percent, direction = percent_between(answer_id, guess_id)
+    assert percent == pytest.approx(scalar(conn, LEN_BETWEEN, (low, high)) / scalar(conn, TOTAL_LEN) * 10**2)
+    assert direction == ("lower" if guess_id <= answer_id else "higher")
+
+    books = 0 if same else max(scalar(conn, BOOKS_BETWEEN, (low, high)) - 1, 0)
+    assert distance_between_books(answer_id, guess_id) == {
+        "percent": pytest.approx(books / scalar(conn, TOTAL_BOOKS) * 10**2),
+        "count": books,
+        "unit": "books",
+    }
+
+    chapters = 0 if same else max(scalar(conn, CHAPTERS_BETWEEN, (low, high)) - 1, 0)
+    assert distance_between_chapters(answer_id, guess_id, book) == {
+        "percent": pytest.approx(chapters / scalar(conn, TOTAL_CHAPTERS, (book,)) * 10**2),
+        "count": chapters,
+        "unit": "chapters",
+    }
+
+    verses = 0 if same else scalar(conn, VERSES_BETWEEN, (low, high))
+    assert distance_between_verses(answer_id, guess_id, book, chapter) == {
+        "percent": pytest.approx(verses / scalar(conn, TOTAL_VERSES, (book, chapter)) * 10**2),
+        "count": verses,
+        "unit": "verses",
+    }
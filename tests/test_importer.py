@@ -0,0 +1,93 @@
+import json
+from io import StringIO
+from os import path
+from sqlite3 import connect
+
+import pytest
+
+import importer
+from database import DATABASE
+from importer import LIST_START, RESULTSET_START, build, json_array_items
+
+# strings holding the separators and brackets the decoder skips between items
+RECORDS = [
+    {"book": "Genesis", "chapter": 1, "verse": 1, "text": "In the beginning, [God] created"},
+    {"book": "1 Cor", "chapter": 13, "verse": 4, "text": 'Charity "suffereth" long ]},{'},
+    {"book": 43, "chapter": 3, "verse": 16, "text": "For God so loved the world — ünïcode"},
+]
+LIST_DUMP = "\n  [\n" + ",\n".join(json.dumps(record) for record in RECORDS) + "\n]\n"
+RESULTSET_DUMP = json.dumps(
+    {"resultset": {"keys": ["id"], "row": [{"field": [i, *record.values()]} for i, record in enumerate(RECORDS, 1)]}}
+)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 7, 64, importer.CHUNK_SIZE])
+def test_json_array_items_across_chunk_boundaries(monkeypatch, chunk_size):
+    monkeypatch.setattr(importer, "CHUNK_SIZE", chunk_size)
+
+    assert list(json_array_items(StringIO(LIST_DUMP), LIST_START)) == RECORDS
+    rows = list(json_array_items(StringIO(RESULTSET_DUMP), RESULTSET_START))
+    assert [row["field"][1:] for row in rows] == [list(record.values()) for record in RECORDS]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, importer.CHUNK_SIZE])
+def test_json_array_items_rejects_broken_dumps(monkeypatch, chunk_size):
+    monkeypatch.setattr(importer, "CHUNK_SIZE", chunk_size)
+
+    with pytest.raises(ValueError):
+        list(json_array_items(StringIO('{"verses": {}}'), RESULTSET_START))
+    with pytest.raises(ValueError):
+        list(json_array_items(StringIO(LIST_DUMP[: len(LIST_DUMP) // 2]), LIST_START))
+
+
+def verses(filename: str) -> list:
+    conn = connect(filename)
+    rows = conn.execute(
+        "SELECT k.id, k.book, k.chapter, k.verse, k.text, k.len FROM kjv AS k ORDER BY k.id;"
+    ).fetchall()
+    conn.close()
+    return rows
+
+
+def dump(filename: str, source: str, extension: str) -> str:
+    conn = connect(filename)
+    rows = conn.execute(
+        """
+        SELECT k.id, bi.title_short, k.chapter, k.verse, k.text
+          FROM kjv AS k
+            JOIN book_info AS bi ON bi.`order` = k.book
+         ORDER BY k.id;
+        """
+    ).fetchall()
+    conn.close()
+
+    records = [
+        {"book": book, "chapter": chapter, "verse": verse, "text": text} for _, book, chapter, verse, text in rows
+    ]
+    source += extension
+    with open(source, "w", encoding="utf-8") as f:
+        if extension == ".tsv":
+            f.write("book\tchapter\tverse\ttext\n")
+            f.writelines(f"{book}\t{chapter}\t{verse}\t{text}\n" for _, book, chapter, verse, text in rows)
+        elif extension == ".jsonl":
+            f.writelines(json.dumps(record) + "\n" for record in records)
+        elif extension == ".json":
+            json.dump(records, f)
+        else:
+            json.dump({"resultset": {"row": [{"field": list(row)} for row in rows]}}, f)
+    return source
+
+
+@pytest.mark.parametrize("extension", [".tsv", ".jsonl", ".json", ".resultset.json"])
+def test_synthetic_database_round_trips(monkeypatch, tmp_path, extension):
+    # a chunk holds a few dozen verses, so most of them straddle a boundary
+    monkeypatch.setattr(importer, "CHUNK_SIZE", 4096)
+    source = dump(DATABASE, path.join(tmp_path, "synthetic"), extension)
+    output = path.join(tmp_path, "imported.db")
+
+    assert build(source, output) == len(verses(DATABASE))
+    assert verses(output) == verses(DATABASE)
+
+    conn = connect(output)
+    assert conn.execute("PRAGMA user_version;").fetchone()[0] != 0
+    conn.close()
@@ -0,0 +1,32 @@
+from asyncio import run
+
+import lookups
+from catalog import catalog
+from configuration import DEFAULT_TRANSLATION
+from distance import verse_index
+from game import score_guess
+from lookups import load_translation, loaded_translation, use_translation, verse_by_id
+
+
+def test_a_loaded_translation_is_used_without_a_worker(monkeypatch):
+    loaded = load_translation(DEFAULT_TRANSLATION)
+    assert loaded_translation(DEFAULT_TRANSLATION) is loaded
+
+    async def no_worker(*args, **kwargs):
+        raise AssertionError("went to the worker pool")
+
+    monkeypatch.setattr(lookups, "run_blocking", no_worker)
+    assert run(use_translation(DEFAULT_TRANSLATION)) is loaded
+
+
+def test_scoring_uses_the_tables_it_is_given():
+    loaded = load_translation(DEFAULT_TRANSLATION)
+    answer_id, guess_id = catalog().verse_ids[10], catalog().verse_ids[-10]
+    answer, guess = verse_by_id(answer_id, loaded=loaded), verse_by_id(guess_id, loaded=loaded)
+    expected = score_guess(answer, guess)
+
+    # evicted from every cache after it was handed out
+    catalog.cache_clear()
+    verse_index.cache_clear()
+    assert score_guess(answer, guess, loaded=loaded) == expected
+    assert catalog.cache_info().currsize == 0 and verse_index.cache_info().currsize == 0
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from configuration import Difficulty, DistanceMethod
+from par import difficulty_table, solve
+
+TIERS = [Difficulty.Easy.value, Difficulty.Medium.value, Difficulty.Hard.value]
+
+
+@pytest.fixture(scope="module")
+def tiers():
+    solved = [solve(method.value) for method in DistanceMethod]
+    par = sum(par.astype(np.int64) for par, _ in solved)
+    effort = sum(effort for _, effort in solved)
+    table = difficulty_table()
+    return [(par[table == tier], effort[table == tier]) for tier in TIERS]
+
+
+def test_every_tier_has_verses(tiers):
+    assert all(len(par) for par, _ in tiers)
+
+
+def test_tiers_differ_in_mean_par(tiers):
+    means = [par.mean() for par, _ in tiers]
+    assert means[0] < means[1] < means[2]
+
+
+def test_harder_tiers_never_have_a_lower_par(tiers):
+    for (easier, _), (harder, _) in zip(tiers, tiers[1:]):
+        assert easier.max() <= harder.min()
+
+
+def test_equal_pars_are_split_by_the_verses_still_possible(tiers):
+    (_, easy), (medium_par, medium), (hard_par, hard) = tiers
+    assert easy.mean() < medium.mean() < hard.mean()
+    # among verses of the same par, the harder tier kept more of them possible for longer
+    shared = np.intersect1d(medium_par, hard_par)
+    for par in shared:
+        assert medium[medium_par == par].max() <= hard[hard_par == par].min()
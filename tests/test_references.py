@@ -0,0 +1,64 @@
+import pytest
+
+from references import find_book, parse_reference
+
+
+@pytest.mark.parametrize(
+    "text, book",
+    [
+        ("Genesis", "Genesis"),
+        ("gen", "Genesis"),
+        ("gn", "Genesis"),
+        ("jn", "John"),
+        ("1 Cor", "1 Corinthians"),
+        ("1cor", "1 Corinthians"),
+        ("I Corinthians", "1 Corinthians"),
+        ("ii kgs", "2 Kings"),
+        ("Third John", "3 John"),
+        ("Ps", "Psalms"),
+        ("Song", "Song of Solomon"),
+        ("jude", "Jude"),
+        ("judg", "Judges"),
+    ],
+)
+def test_find_book(text, book):
+    assert find_book(text) == book
+
+
+@pytest.mark.parametrize("text", ["jud", "jo", "1", "nothing"])
+def test_ambiguous_or_unknown_books_are_not_found(text):
+    assert find_book(text) is None
+
+
+@pytest.mark.parametrize(
+    "text, reference",
+    [
+        ("jn 3 16", ("John", 3, 16)),
+        ("1 Cor 13:4", ("1 Corinthians", 13, 4)),
+        ("Ps119.5", ("Psalms", 119, 5)),
+        ("  gen. 1 : 1  ", ("Genesis", 1, 1)),
+        ("II Kings 2 3", ("2 Kings", 2, 3)),
+        ("iii jn 1:4", ("3 John", 1, 4)),
+        ("Jude 5", ("Jude", 1, 5)),
+        ("Jude 1:5", ("Jude", 1, 5)),
+    ],
+)
+def test_parse_reference(text, reference):
+    assert parse_reference(text) == dict(zip(("book", "chapter", "verse"), reference))
+
+
+@pytest.mark.parametrize(
+    "text, message",
+    [
+        ("John", "Not a reference"),
+        ("3:16", "Unknown book"),
+        ("jud 5", "Unknown book"),
+        ("jn 3", "Missing verse"),
+        ("jn 99:1", "has no chapter"),
+        ("jn 3:999", "has no verse"),
+        ("Jude 999", "has no verse"),
+    ],
+)
+def test_parse_reference_rejects(text, message):
+    with pytest.raises(ValueError, match=message):
+        parse_reference(text)
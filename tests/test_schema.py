@@ -0,0 +1,25 @@
+from os import path
+from sqlite3 import connect
+
+from database import get_connection
+from schema import migrate, verify
+from synthetic import generate
+
+
+def test_migrated_database_verifies_on_the_pooled_connection():
+    assert verify(get_connection()) == []
+
+
+def test_missing_indexes_are_reported_then_migrated(tmp_path):
+    filename = path.join(tmp_path, "bare.db")
+    generate(filename, scale=0.1)
+    conn = connect(filename)
+
+    problems = verify(conn)
+    assert "missing index on kjv(book, chapter, verse)" in problems
+    assert any(problem.startswith("id by reference does a full scan") for problem in problems)
+    assert "missing full-text index for kjv, the practice page needs it" in problems
+
+    migrate(conn)
+    assert verify(conn) == []
+    conn.close()
@@ -0,0 +1,46 @@
+from functools import lru_cache
+from os import environ
+from sqlite3 import Connection
+from typing import Dict, List, Set
+
+from configuration import DEFAULT_TRANSLATION
+from database import get_connection
+
+# translations whose catalog, indexes and texts are kept in memory at once, least recently used dropped first
+MAX_LOADED = int(environ.get("SWORDDRILL_TRANSLATIONS", 2))
+
+VERSE_COLUMNS = {"id", "book", "chapter", "verse", "text"}
+
+
+def verse_tables(conn: Connection) -> Dict[str, Set[str]]:
+    """Every table shaped like kjv, with its columns; len is optional."""
+    tables = {}
+    for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%';"):
+        columns = {info[1] for info in conn.execute(f"PRAGMA table_info(`{row[0]}`);")}
+        if VERSE_COLUMNS <= columns:
+            tables[row[0]] = columns
+    return tables
+
+
+@lru_cache(maxsize=1)
+def _verse_tables() -> Dict[str, Set[str]]:
+    return verse_tables(get_connection())
+
+
+def translations() -> List[str]:
+    names = sorted(_verse_tables())
+    if DEFAULT_TRANSLATION in names:
+        names.remove(DEFAULT_TRANSLATION)
+        names.insert(0, DEFAULT_TRANSLATION)
+    return names
+
+
+def verse_table(translation: str) -> str:
+    # table names can't be bound as parameters, only known ones are put into queries
+    if translation not in _verse_tables():
+        raise KeyError(f"unknown translation {translation}")
+    return translation
+
+
+def len_column(translation: str) -> str:
+    return "k.len" if "len" in _verse_tables()[verse_table(translation)] else "length(k.text)"
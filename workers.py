@@ -0,0 +1,17 @@
+from asyncio import get_running_loop
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from os import environ
+
+# upper bound on scoring / answer selection work running at once, off the event loop
+MAX_WORKERS = int(environ.get("SWORDDRILL_WORKERS", 4))
+
+executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="sworddrill")
+
+
+async def run_blocking(fn, *args, **kwargs):
+    return await get_running_loop().run_in_executor(executor, partial(fn, *args, **kwargs))
+
+
+def shutdown():
+    executor.shutdown(wait=False, cancel_futures=True)